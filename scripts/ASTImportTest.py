@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+
+"""
+Tests the ast-import option of the compiler: the AST of every syntax test and AST JSON test is
+exported, loaded into the compiler again and exported a second time. Both exports have to be
+identical.
+
+All sources of a test are exported with a single Standard JSON call. The Standard JSON output is
+passed to ``solc --import-ast`` as is. The ASTs of both exports are compared by a hash of their
+canonical JSON serialization; only when they differ, the first difference is located and printed.
+Tests are processed in parallel. Test files are split into their sources with the shared parser
+of isoltest_format.py, which caches the result between runs.
+
+Usage:
+
+  scripts/ASTImportTest.py [--solc PATH] [--jobs N]
+
+The compiler defaults to ``$SOLIDITY_BUILD_DIR/solc/solc`` (``build/solc/solc``).
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from isoltest_format import TestFileCache, TestFileFormatError, read_external_sources
+
+REPO_ROOT = Path(__file__).parents[1]
+SOLIDITY_BUILD_DIR = Path(os.environ.get("SOLIDITY_BUILD_DIR", REPO_ROOT / "build"))
+TEST_DIRS = [
+    REPO_ROOT / "test/libsolidity/syntaxTests",
+    REPO_ROOT / "test/libsolidity/ASTJSON",
+]
+# boost_filesystem_bug specifically tests a local fix for a boost::filesystem
+# bug. Since the test involves a malformed path, there is no point in running
+# AST tests on it. See https://github.com/boostorg/filesystem/issues/176
+EXCLUDED_TESTS = {"boost_filesystem_bug.sol"}
+
+PASSED = "passed"
+FAILED = "failed"
+UNCOMPILABLE = "uncompilable"
+
+
+def load_sources(cache, test_file):
+    """Returns
+
+    a dictionary of the sources of a test by source unit name or ``None`` if the test cannot be
+    split into sources. The source of a test without ``==== Source: name ====`` lines is named
+    after the test file.
+
+    """
+    name = test_file.relative_to(REPO_ROOT).as_posix()
+    try:
+        parsed = cache.read(test_file)
+        sources = {source_name or name: content for source_name, content in parsed.sources.items()}
+        sources.update(read_external_sources(test_file, parsed))
+    except (UnicodeDecodeError, TestFileFormatError, OSError):
+        # Some tests contain invalid UTF-8 sequences on purpose. They cannot be passed
+        # to Standard JSON and do not compile anyway.
+        return None
+    return sources
+
+
+def canonical_hash(ast):
+    serialized = json.dumps(ast, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(serialized.encode("utf8")).hexdigest()
+
+
+def first_difference(expected, obtained, path=""):
+    """Returns a description of the first place in which two JSON values differ."""
+    if isinstance(expected, dict) and isinstance(obtained, dict):
+        for key in sorted(expected.keys() | obtained.keys()):
+            if key not in obtained:
+                return f"{path}/{key}: missing in the reimported AST"
+            if key not in expected:
+                return f"{path}/{key}: only in the reimported AST"
+            if expected[key] != obtained[key]:
+                return first_difference(expected[key], obtained[key], f"{path}/{key}")
+    elif isinstance(expected, list) and isinstance(obtained, list) and len(expected) == len(obtained):
+        for index, (expected_item, obtained_item) in enumerate(zip(expected, obtained)):
+            if expected_item != obtained_item:
+                return first_difference(expected_item, obtained_item, f"{path}/{index}")
+    return f"{path or '/'}: expected {json.dumps(expected)}, obtained {json.dumps(obtained)}"
+
+
+def export_asts(solc, sources):
+    """Returns
+
+    the Standard JSON output with the ASTs of all sources or ``None`` if they do not compile.
+
+    """
+    standard_json_input = {
+        "language": "Solidity",
+        "sources": {name: {"content": content} for name, content in sources.items()},
+        # The bytecode is not used, but requesting only the AST would stop the compiler after the
+        # analysis. Tests that fail in code generation would then be reimported instead of being
+        # counted as uncompilable, like they are when compiled on the command line.
+        "settings": {"outputSelection": {"*": {"": ["ast"], "*": ["evm.bytecode.object"]}}},
+    }
+    result = subprocess.run(
+        [solc, "--standard-json"],
+        input=json.dumps(standard_json_input),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        universal_newlines=True,
+        encoding="utf8",
+        check=False,
+    )
+    try:
+        output = json.loads(result.stdout)
+    except ValueError:
+        return None
+    if result.returncode != 0 or any(error["severity"] == "error" for error in output.get("errors", [])):
+        return None
+    return output
+
+
+def test_import_export_equivalence(solc, name, sources):
+    """Returns the status of the round trip of a test, an error message and the number of its sources."""
+    if sources is None:
+        return UNCOMPILABLE, None, 1
+
+    exported = export_asts(solc, sources)
+    if exported is None:
+        return UNCOMPILABLE, None, len(sources)
+    expected = {source_name: source["ast"] for source_name, source in exported["sources"].items()}
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        import_file = Path(temporary_dir) / "expected.json"
+        import_file.write_text(json.dumps({"sources": exported["sources"]}), encoding="utf8")
+        result = subprocess.run(
+            [solc, "--import-ast", "--combined-json", "ast", str(import_file)],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            encoding="utf8",
+            check=False,
+        )
+    if result.returncode != 0:
+        return FAILED, (
+            f"ERROR: AST reimport failed for input file {name}\n\n"
+            f"Compiler stderr:\n{result.stderr}\n"
+            f"Compiler stdout:\n{result.stdout}"
+        ), len(sources)
+
+    obtained = {source_name: source["AST"] for source_name, source in json.loads(result.stdout)["sources"].items()}
+    differences = [
+        f"  {source_name}{first_difference(expected.get(source_name), obtained.get(source_name))}"
+        for source_name in sorted(expected.keys() | obtained.keys())
+        if source_name not in expected or source_name not in obtained or
+            canonical_hash(expected[source_name]) != canonical_hash(obtained[source_name])
+    ]
+    if differences:
+        return FAILED, f"ERROR: JSONS differ for {name}:\n" + "\n".join(differences), len(sources)
+    return PASSED, None, len(sources)
+
+
+def find_tests():
+    return sorted(
+        test_file
+        for test_dir in TEST_DIRS
+        for test_file in test_dir.rglob("*.sol")
+        if test_file.name not in EXCLUDED_TESTS
+    )
+
+
+def parse_command_line():
+    parser = ArgumentParser(description="Tests that exporting the AST, importing and exporting it again is lossless.")
+    parser.add_argument(
+        "--solc",
+        default=str(SOLIDITY_BUILD_DIR / "solc/solc"),
+        help="Compiler binary (default: $SOLIDITY_BUILD_DIR/solc/solc).",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Number of tests run in parallel.")
+    return parser.parse_args()
+
+
+def main():
+    options = parse_command_line()
+    test_files = find_tests()
+    print(f"Looking at {len(test_files)} .sol files...")
+
+    counts = {PASSED: 0, FAILED: 0, UNCOMPILABLE: 0}
+    source_count = 0
+    errors = []
+    with TestFileCache() as cache:
+        tests = [
+            (test_file.relative_to(REPO_ROOT).as_posix(), load_sources(cache, test_file))
+            for test_file in test_files
+        ]
+    with ProcessPoolExecutor(max_workers=options.jobs) as executor:
+        futures = [executor.submit(test_import_export_equivalence, options.solc, name, sources) for name, sources in tests]
+        for future in futures:
+            status, message, sources = future.result()
+            counts[status] += 1
+            source_count += sources
+            if message is not None:
+                errors.append(message)
+            print(".", end="", flush=True)
+    print("")
+
+    for message in errors:
+        print(message)
+        print("")
+
+    if counts[FAILED] == 0:
+        print(
+            f"SUCCESS: {counts[PASSED]} tests passed, {counts[FAILED]} failed, "
+            f"{counts[UNCOMPILABLE]} could not be compiled ({source_count} sources total)."
+        )
+        return 0
+
+    print(
+        f"FAILURE: Out of {len(test_files)} tests, {counts[FAILED]} failed, "
+        f"({counts[UNCOMPILABLE]} could not be compiled)."
+    )
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
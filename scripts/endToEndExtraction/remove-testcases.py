@@ -8,6 +8,9 @@ import getopt
 import tempfile
 from getkey import getkey
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from isoltest_format import read_test_file  # pylint: disable=wrong-import-position
+
 
 def parse_call(call):
     function = ''
@@ -61,22 +64,17 @@ def get_checks(content, sol_file_path):
             constructors.append(line)
         if line.startswith("ABI_CHECK") or line.startswith("BOOST_REQUIRE"):
             checks.append(line)
-    with open(sol_file_path, "r", encoding='utf8') as sol_file:
-        sol_constructors = []
-        sol_checks = []
-        inside_expectations = False
-        for line in sol_file.readlines():
-            if line.startswith("// constructor()"):
-                sol_constructors.append(line)
-            elif inside_expectations and line.startswith("// "):
-                sol_checks.append(line)
-            if line.startswith("// ----"):
-                inside_expectations = True
-        sol_file.close()
-        if len(constructors) == len(sol_constructors) == 1:
-            checks.insert(0, constructors[0])
-            sol_checks.insert(0, sol_constructors[0])
-        return checks, sol_checks
+    sol_constructors = []
+    sol_checks = []
+    for line in read_test_file(sol_file_path).expectations:
+        if line.startswith("// constructor()"):
+            sol_constructors.append(line)
+        elif line.startswith("// "):
+            sol_checks.append(line)
+    if len(constructors) == len(sol_constructors) == 1:
+        checks.insert(0, constructors[0])
+        sol_checks.insert(0, sol_constructors[0])
+    return checks, sol_checks
 
 
 def show_test(name, content, sol_file_path, current_test, test_count):
@@ -10,13 +10,78 @@
 # verify-testcases.py will compare both traces. If these traces are identical, the extracted tests were
 # identical with the tests specified in SolidityEndToEndTest.cpp.
 #
+# A trace that is compared repeatedly (e.g. against traces of different compiler builds or EVM versions)
+# can be parsed once and stored in an indexed SQLite database with
+#     verify-testcases.py -i SolidityEndToEndTest.trace -d SolidityEndToEndTest.sqlite
+# Such a database can be passed to -s or -e instead of a trace file.
+#
 # pylint: disable=too-many-instance-attributes
 
+import hashlib
 import re
 import os
 import sys
 import getopt
 import json
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+
+
+# Matches every line of the trace that is relevant for the analysis, lines that do not match
+# are ignored. The alternatives that are anchored at the beginning of the line come first,
+# so that lines that are not of interest are rejected as early as possible.
+TRACE_LINE_PATTERN = re.compile(
+    r'\s*(?:'
+    r'CREATE\s*(?P<create>[a-fA-F0-9]*):'
+    r'|CALL\s*(?P<caller>[a-fA-F0-9]*)\s*->\s*(?P<callee>[a-fA-F0-9]*):'
+    r'|(?P<parameter>in|out|result|gas\sused|value):\s*(?P<value>[a-fA-F0-9]*)'
+    r'|metadata:\s*(?P<metadata>.*)$'
+    r')'
+    r'|.*Entering test case "(?P<test>.*)"',
+    re.I
+)
+
+SQLITE_HEADER = b"SQLite format 3\x00"
+
+# Attributes of Trace that are set by the parameter lines following a CREATE or CALL
+TRACE_PARAMETERS = {
+    "in": "input",
+    "out": "output",
+    "result": "result",
+    "gas used": "gas",
+    "value": "value",
+}
+
+
+def metadata_json(metadata):
+    return json.dumps(metadata, sort_keys=True)
+
+
+def metadata_mismatch(left, right):
+    return "metadata where different: " + left + " != " + right
+
+
+def trace_count_mismatch(left, right):
+    return "trace count are different: " + str(left) + " != " + str(right)
+
+
+def trace_mismatch(left, right):
+    markers = "".join(
+        " " if ch < len(right) and left[ch] == right[ch] else "|"
+        for ch in range(len(left))
+    )
+    return "    " + left + "\n" + "    " + right + "\n" + "    " + markers + "\n"
+
+
+def print_mismatches(test_count, mismatches):
+    # The same mismatch is only reported once per test.
+    mismatches = list(dict.fromkeys(mismatches))
+    for mismatch in mismatches:
+        print(mismatch[0])
+        print(mismatch[1])
+
+    print(test_count, "test-cases - ", len(mismatches), " mismatche(s)")
 
 
 class Trace:
@@ -28,6 +93,7 @@ class Trace:
         self.value = ""
         self.result = ""
         self.gas = ""
+        self._digest = None
 
     def get_input(self):
         return self._input
@@ -55,6 +121,13 @@ class Trace:
         )
         return result
 
+    def digest(self):
+        """Returns a hash of the string representation of the trace. It is computed once,
+        so the trace must not change anymore after the first call."""
+        if self._digest is None:
+            self._digest = hashlib.blake2b(str(self).encode('utf8'), digest_size=16).digest()
+        return self._digest
+
 
 class TestCase:
     def __init__(self, name):
@@ -67,6 +140,9 @@ class TestCase:
         self.traces.append(trace)
         return trace
 
+    def digests(self):
+        return [trace.digest() for trace in self.traces]
+
 
 class TraceAnalyser:
     def __init__(self, file):
@@ -78,53 +154,35 @@ class TraceAnalyser:
         with open(self.file, "r", encoding='utf8') as trace_file:
             trace = None
             test_case = None
-            for line in trace_file.readlines():
-                test = re.search(r'Entering test case "(.*)"', line, re.M | re.I)
-                if test:
-                    test_name = test.group(1)
+            # Iterating over the file reads it line by line, a trace is never held in memory as a whole.
+            for line in trace_file:
+                match = TRACE_LINE_PATTERN.match(line)
+                if not match:
+                    continue
+
+                kind = match.lastgroup
+                if kind == "test":
+                    test_name = match.group("test")
                     test_case = TestCase(test_name)
                     self.tests[test_name] = test_case
-
-                metadata = re.search(r'\s*metadata:\s*(.*)$', line, re.M | re.I)
-                if metadata:
-                    test_case.metadata = json.loads(metadata.group(1))
+                elif kind == "metadata":
+                    test_case.metadata = json.loads(match.group("metadata"))
                     del test_case.metadata["sources"]
                     del test_case.metadata["compiler"]["version"]
-
-                create = re.search(r'CREATE\s*([a-fA-F0-9]*):', line, re.M | re.I)
-                if create:
-                    trace = test_case.add_trace("create", create.group(1))
-
-                call = re.search(r'CALL\s*([a-fA-F0-9]*)\s*->\s*([a-fA-F0-9]*):', line, re.M | re.I)
-                if call:
-                    trace = test_case.add_trace("call", call.group(1))  # + "->" + call.group(2))
-
-                if not create and not call:
-                    self.parse_parameters(line, trace)
-
-            trace_file.close()
+                elif kind == "create":
+                    trace = test_case.add_trace("create", match.group("create"))
+                elif kind == "callee":
+                    trace = test_case.add_trace("call", match.group("caller"))  # + "->" + match.group("callee"))
+                elif kind == "value" and trace is not None:
+                    self.parse_parameter(match.group("parameter"), match.group("value"), trace)
 
             print(self.file + ":", len(self.tests), "test-cases.")
 
             self.ready = True
 
     @staticmethod
-    def parse_parameters(line, trace):
-        input = re.search(r'\s*in:\s*([a-fA-F0-9]*)', line, re.M | re.I)
-        if input:
-            trace.input = input.group(1)
-        output = re.search(r'\s*out:\s*([a-fA-F0-9]*)', line, re.M | re.I)
-        if output:
-            trace.output = output.group(1)
-        result = re.search(r'\s*result:\s*([a-fA-F0-9]*)', line, re.M | re.I)
-        if result:
-            trace.result = result.group(1)
-        gas_used = re.search(r'\s*gas\sused:\s*([a-fA-F0-9]*)', line, re.M | re.I)
-        if gas_used:
-            trace.gas = gas_used.group(1)
-        value = re.search(r'\s*value:\s*([a-fA-F0-9]*)', line, re.M | re.I)
-        if value:
-            trace.value = value.group(1)
+    def parse_parameter(parameter, value, trace):
+        setattr(trace, TRACE_PARAMETERS[re.sub(r'\s', ' ', parameter.lower())], value)
 
     def diff(self, analyser):
         if not self.ready:
@@ -132,56 +190,184 @@ class TraceAnalyser:
         if not analyser.ready:
             analyser.analyse()
 
-        intersection = set(self.tests.keys()) & set(analyser.tests.keys())
-        mismatches = set()
+        # Tests are compared in the order in which they appear in the first trace,
+        # so that mismatches are always reported in the same order.
+        intersection = [test_name for test_name in self.tests if test_name in analyser.tests]
+        mismatches = []
 
         for test_name in intersection:
             left = self.tests[test_name]
             right = analyser.tests[test_name]
-            if json.dumps(left.metadata) != json.dumps(right.metadata):
-                mismatches.add(
-                    (test_name, "metadata where different: " + json.dumps(left.metadata) + " != " + json.dumps(
-                        right.metadata)))
+            if metadata_json(left.metadata) != metadata_json(right.metadata):
+                mismatches.append(
+                    (test_name, metadata_mismatch(metadata_json(left.metadata), metadata_json(right.metadata))))
             if len(left.traces) != len(right.traces):
-                mismatches.add((test_name, "trace count are different: " + str(len(left.traces)) +
-                                " != " + str(len(right.traces))))
-            else:
+                mismatches.append((test_name, trace_count_mismatch(len(left.traces), len(right.traces))))
+            elif left.digests() != right.digests():
                 self.check_traces(test_name, left, right, mismatches)
 
-        for mismatch in mismatches:
-            print(mismatch[0])
-            print(mismatch[1])
+        print_mismatches(len(intersection), mismatches)
 
-        print(len(intersection), "test-cases - ", len(mismatches), " mismatche(s)")
-
-    def check_traces(self, test_name, left, right, mismatches):
-        for trace_id, trace in enumerate(left.traces):
-            left_trace = trace
-            right_trace = right.traces[trace_id]
+    @staticmethod
+    def check_traces(test_name, left, right, mismatches):
+        for left_trace, right_trace in zip(left.traces, right.traces):
             assert left_trace.kind == right_trace.kind
-            if str(left_trace) != str(right_trace):
-                mismatch_info = "    " + str(left_trace) + "\n"
-                mismatch_info += "    " + str(right_trace) + "\n"
-                mismatch_info += "    "
-                for ch in range(0, len(str(left_trace))):
-                    if ch < len(str(left_trace)) and ch < len(str(right_trace)):
-                        if str(left_trace)[ch] != str(right_trace)[ch]:
-                            mismatch_info += "|"
-                        else:
-                            mismatch_info += " "
-                    else:
-                        mismatch_info += "|"
-                mismatch_info += "\n"
-                mismatches.add((test_name, mismatch_info))
+            if left_trace.digest() != right_trace.digest():
+                mismatches.append((test_name, trace_mismatch(str(left_trace), str(right_trace))))
+
+
+class TraceStore:
+    """SQLite database holding the tests of a parsed trace, so that the trace can be compared
+    against other traces without parsing it again. Tests and traces are stored with their
+    digests and are compared by indexed queries; only the traces of tests whose digests
+    differ are read."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS tests (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        metadata TEXT NOT NULL,
+        trace_count INTEGER NOT NULL,
+        digest BLOB NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS traces (
+        test INTEGER NOT NULL REFERENCES tests (id),
+        position INTEGER NOT NULL,
+        kind TEXT NOT NULL,
+        digest BLOB NOT NULL,
+        text TEXT NOT NULL,
+        PRIMARY KEY (test, position)
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(self.SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    @staticmethod
+    def is_store(path):
+        with open(path, "rb") as f:
+            return f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+
+    def import_trace(self, analyser):
+        """Replaces the content of the store with the tests of the trace."""
+        if not analyser.ready:
+            analyser.analyse()
+
+        with self.connection:
+            self.connection.execute("DELETE FROM traces")
+            self.connection.execute("DELETE FROM tests")
+            for test_name, test_case in analyser.tests.items():
+                digests = test_case.digests()
+                test_id = self.connection.execute(
+                    "INSERT INTO tests (name, metadata, trace_count, digest) VALUES (?, ?, ?, ?)",
+                    (
+                        test_name, metadata_json(test_case.metadata), len(digests),
+                        hashlib.blake2b(b"".join(digests), digest_size=16).digest()
+                    )
+                ).lastrowid
+                self.connection.executemany(
+                    "INSERT INTO traces (test, position, kind, digest, text) VALUES (?, ?, ?, ?, ?)",
+                    (
+                        (test_id, position, trace.kind, trace.digest(), str(trace))
+                        for position, trace in enumerate(test_case.traces)
+                    )
+                )
+
+    def diff(self, store):
+        self.connection.execute("ATTACH DATABASE ? AS other", (store.path,))
+        try:
+            test_count = self.connection.execute(
+                "SELECT count(*) FROM main.tests AS l JOIN other.tests AS r ON r.name = l.name"
+            ).fetchone()[0]
+            candidates = self.connection.execute("""
+                SELECT l.id, r.id, l.name, l.metadata, r.metadata, l.trace_count, r.trace_count
+                FROM main.tests AS l JOIN other.tests AS r ON r.name = l.name
+                WHERE l.metadata != r.metadata OR l.trace_count != r.trace_count OR l.digest != r.digest
+                ORDER BY l.id
+            """).fetchall()
+
+            mismatches = []
+            for left_id, right_id, test_name, left_metadata, right_metadata, left_count, right_count in candidates:
+                if left_metadata != right_metadata:
+                    mismatches.append((test_name, metadata_mismatch(left_metadata, right_metadata)))
+                if left_count != right_count:
+                    mismatches.append((test_name, trace_count_mismatch(left_count, right_count)))
+                else:
+                    self.check_traces(test_name, left_id, right_id, mismatches)
+        finally:
+            self.connection.execute("DETACH DATABASE other")
+
+        print_mismatches(test_count, mismatches)
+
+    def check_traces(self, test_name, left_id, right_id, mismatches):
+        for left_kind, right_kind, left_text, right_text in self.connection.execute("""
+            SELECT l.kind, r.kind, l.text, r.text
+            FROM main.traces AS l JOIN other.traces AS r ON r.test = ? AND r.position = l.position
+            WHERE l.test = ? AND l.digest != r.digest
+            ORDER BY l.position
+        """, (right_id, left_id)):
+            assert left_kind == right_kind
+            mismatches.append((test_name, trace_mismatch(left_text, right_text)))
+
+
+@contextmanager
+def open_store(path, temporary_dir):
+    """Yields a store for the file, importing it into a temporary store if it is a trace."""
+    if TraceStore.is_store(path):
+        store_path = path
+    else:
+        store_path = os.path.join(temporary_dir, str(len(os.listdir(temporary_dir))) + ".sqlite")
+
+    with TraceStore(store_path) as store:
+        if store_path != path:
+            store.import_trace(TraceAnalyser(path))
+        yield store
+
+
+def import_into_store(trace_file, database_file):
+    if not trace_file or not database_file:
+        print("-i and -d have to be used together. aborting.")
+        sys.exit(2)
+    if not os.path.isfile(trace_file):
+        print("trace file '" + trace_file + "' not found. aborting.")
+        sys.exit(1)
+    with TraceStore(database_file) as store:
+        store.import_trace(TraceAnalyser(trace_file))
+    print("imported into " + database_file)
+
+
+def compare_traces(left_file, right_file):
+    """Compares the files, through stores if either of them is a store and by parsing both traces otherwise."""
+    if not TraceStore.is_store(left_file) and not TraceStore.is_store(right_file):
+        TraceAnalyser(left_file).diff(TraceAnalyser(right_file))
+        return
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        with open_store(left_file, temporary_dir) as left_store, open_store(right_file, temporary_dir) as right_store:
+            left_store.diff(right_store)
 
 
 def main(argv):
     extracted_tests_trace_file = None
     end_to_end_trace_file = None
+    import_trace_file = None
+    database_file = None
     try:
-        opts, _args = getopt.getopt(argv, "s:e:")
+        opts, _args = getopt.getopt(argv, "s:e:i:d:")
     except getopt.GetoptError:
         print("verify-testcases.py [-s <path to semantic-trace>] [-e <path to endToEndExtraction-trace>]")
+        print("verify-testcases.py -i <path to trace> -d <path to database>")
         sys.exit(2)
 
     for opt, arg in opts:
@@ -189,6 +375,14 @@ def main(argv):
             extracted_tests_trace_file = arg
         elif opt in '-e':
             end_to_end_trace_file = arg
+        elif opt in '-i':
+            import_trace_file = arg
+        elif opt in '-d':
+            database_file = arg
+
+    if import_trace_file or database_file:
+        import_into_store(import_trace_file, database_file)
+        return
 
     base_path = os.path.dirname(__file__)
     if not extracted_tests_trace_file:
@@ -205,11 +399,7 @@ def main(argv):
         print("semantic trace file '" + extracted_tests_trace_file + "' not found. aborting.")
         sys.exit(1)
 
-    semantic_trace = TraceAnalyser(extracted_tests_trace_file)
-    end_to_end_trace = TraceAnalyser(end_to_end_trace_file)
-
-    semantic_trace.diff(end_to_end_trace)
-
+    compare_traces(extracted_tests_trace_file, end_to_end_trace_file)
 
 if __name__ == "__main__":
     main(sys.argv[1:])
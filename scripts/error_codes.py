@@ -1,21 +1,95 @@
 #! /usr/bin/env python3
+import bisect
+import hashlib
+import json
 import random
 import re
 import os
 import getopt
 import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from os import path
 
+from isoltest_format import EXPECTATIONS_DELIMITER
+
 ENCODING = "utf-8"
+DEFAULT_CACHE_FILE_NAME = ".error_codes_cache.json"
+DEFAULT_POLL_INTERVAL = 0.25
+# Error expectations are only recognized in the expectations section of isoltest files,
+# i.e. after the "// ----" line.
+TEST_EXPECTATIONS_START_PATTERN = re.compile(b"^" + re.escape(EXPECTATIONS_DELIMITER.encode(ENCODING)), re.MULTILINE)
+TEST_EXPECTATION_PATTERN = re.compile(rb"^// (?:.*Error|Warning|Info) (\d\d\d\d):", re.MULTILINE)
+CMDLINE_TEST_ERR_PATTERN = re.compile(rb" \((\d\d\d\d)\):")
+
+SOURCE_SUB_DIRS = ["libevmasm", "liblangutil", "libsolc", "libsolidity", "libsolutil", "libyul", "solc"]
+SOURCE_EXTENSIONS = [".h", ".cpp"]
+TEST_SUB_DIRS = [
+    path.join("test", "libsolidity", "errorRecoveryTests"),
+    path.join("test", "libsolidity", "smtCheckerTests"),
+    path.join("test", "libsolidity", "syntaxTests"),
+    path.join("test", "libyul", "yulSyntaxTests")
+]
+TEST_EXTENSIONS = [".sol", ".yul"]
+# special case, we are interested in warnings which are ignored by regular tests:
+# Warning (1878): SPDX license identifier not provided in source file. ....
+# Warning (3420): Source file does not specify required compiler version!
+CMDLINE_TEST_ERR = path.join("test", "cmdlineTests", "error_codes", "err")
+
+# white list of ids which are not covered by tests
+WHITE_IDS = {
+    "9804", # Tested in test/libyul/ObjectParser.cpp.
+    "1544",
+    "1749",
+    "2674",
+    "6367",
+    "8387",
+    "3805", # "This is a pre-release compiler version, please do not use it in production."
+            # The warning may or may not exist in a compiler build.
+    "4591", # "There are more than 256 warnings. Ignoring the rest."
+            # Due to 3805, the warning lists look different for different compiler builds.
+    "1834", # Unimplemented feature error, as we do not test it anymore via cmdLineTests
+    "5430"  # basefee being used in inline assembly for EVMVersion < london
+}
+
+OLD_SOURCE_ONLY_IDS = {
+    "1584", "1823",
+    "1988", "2066", "2833", "3356",
+    "3893", "3996", "4010", "4802",
+    "5272", "5622", "7128", "7400",
+    "7589", "7593", "7649", "7710",
+    "8065", "8084", "8140",
+    "8312", "8592", "9134", "9609",
+}
+
+# Below this number of files to (re)scan, starting worker processes costs more than it saves.
+PARALLEL_SCAN_THRESHOLD = 64
 SOURCE_FILE_PATTERN = r"\b\d+_error\b"
 
+# Matches C++ comments and string/character literals. Every alternative starts with a literal
+# character so that the regex engine can skip ahead quickly. Raw strings have to come before
+# plain strings and character literals must not follow an identifier character (C++14 digit
+# separators such as 1'000).
+COMMENT_OR_LITERAL_PATTERN = re.compile(
+    r'/(?:/[^\n]*|\*.*?(?:\*/|\Z))'
+    r'|(?:R|u8R|uR|UR|LR)"(?P<delimiter>[^(\s]*)\(.*?\)(?P=delimiter)"'
+    r'|"(?:\\.|[^"\\\n])*"'
+    r"|'(?<![0-9A-Za-z_]')(?:\\.|[^'\\\n])*'",
+    re.DOTALL
+)
+
+
+def file_encoding(file_name):
+    _, tail = path.split(file_name)
+    return "latin-1" if tail == "invalid_utf8_sequence.sol" else ENCODING
+
 
 def read_file(file_name):
     content = None
-    _, tail = path.split(file_name)
-    is_latin = tail == "invalid_utf8_sequence.sol"
     try:
-        with open(file_name, "r", encoding="latin-1" if is_latin else ENCODING) as f:
+        with open(file_name, "r", encoding=file_encoding(file_name)) as f:
             content = f.read()
     finally:
         if content == None:
@@ -23,43 +97,187 @@ def read_file(file_name):
     return content
 
 
+def read_binary_file(file_name):
+    with open(file_name, "rb") as f:
+        return f.read()
+
+
 def write_file(file_name, content):
     with open(file_name, "w", encoding=ENCODING) as f:
         f.write(content)
 
 
-def in_comment(source, pos):
-    slash_slash_pos = source.rfind("//", 0, pos)
-    lf_pos = source.rfind("\n", 0, pos)
-    if slash_slash_pos > lf_pos:
-        return True
-    slash_star_pos = source.rfind("/*", 0, pos)
-    star_slash_pos = source.rfind("*/", 0, pos)
-    return slash_star_pos > star_slash_pos
+def find_comment_spans(source):
+    """
+    Tokenizes the source once and returns the start and end offsets of all comments
+    and string literals, both sorted in ascending order
+    """
 
+    starts = []
+    ends = []
+    for m in COMMENT_OR_LITERAL_PATTERN.finditer(source):
+        starts.append(m.start())
+        ends.append(m.end())
+    return starts, ends
 
-def find_ids_in_source_file(file_name, id_to_file_names):
-    source = read_file(file_name)
+
+def in_comment(comment_spans, pos):
+    starts, ends = comment_spans
+    k = bisect.bisect_right(starts, pos) - 1
+    return k >= 0 and pos < ends[k]
+
+
+def extract_ids_from_source(source):
+    """Returns a list of all ids outside of comments and string literals, in order of appearance"""
+
+    ids = []
+    if "_error" not in source:
+        return ids
+    # Most files do not contain any IDs so only tokenize the ones that do.
+    comment_spans = None
     for m in re.finditer(SOURCE_FILE_PATTERN, source):
-        if in_comment(source, m.start()):
+        if comment_spans is None:
+            comment_spans = find_comment_spans(source)
+        if in_comment(comment_spans, m.start()):
             continue
         underscore_pos = m.group(0).index("_")
-        id = m.group(0)[0:underscore_pos]
+        ids.append(m.group(0)[0:underscore_pos])
+    return ids
+
+
+def add_source_ids(file_name, ids, id_to_file_names):
+    for id in ids:
         if id in id_to_file_names:
             id_to_file_names[id].append(file_name)
         else:
             id_to_file_names[id] = [file_name]
 
 
-def find_ids_in_source_files(file_names):
+def find_ids_in_source_file(file_name, id_to_file_names):
+    add_source_ids(file_name, extract_ids_from_source(read_file(file_name)), id_to_file_names)
+
+
+def find_ids_in_source_files(file_names, cache=None):
     """Returns a dictionary with list of source files for every appearance of every id"""
 
     id_to_file_names = {}
-    for file_name in file_names:
-        find_ids_in_source_file(file_name, id_to_file_names)
+    for file_name, ids in zip(file_names, scan_files(SOURCE_FILES, file_names, cache)):
+        add_source_ids(file_name, ids, id_to_file_names)
     return id_to_file_names
 
 
+SOURCE_FILES = "source"
+TEST_FILES = "test"
+
+
+def extract_ids(kind, file_name, content):
+    """Returns the ids found in the content of the file, as a JSON-serializable list"""
+
+    if kind == TEST_FILES:
+        return sorted(extract_ids_from_test_content(content))
+    assert kind == SOURCE_FILES
+    try:
+        return extract_ids_from_source(content.decode(file_encoding(file_name)))
+    except UnicodeDecodeError:
+        print(f"Error reading: {file_name}")
+        raise
+
+
+class ScanCache:
+    """
+    Persistent cache of the ids extracted from source and test files.
+
+    Entries are keyed by the kind of file and its path. An entry is reused as is while the
+    modification time and size of the file stay the same. Otherwise the file is read again and
+    its ids are re-extracted only if the hash of its content has changed.
+    """
+
+    # Version 2 only extracts the ids of test files after the ``// ----`` line.
+    VERSION = 2
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.entries = {SOURCE_FILES: {}, TEST_FILES: {}}
+        self.modified = False
+
+        try:
+            with open(cache_file, "r", encoding=ENCODING) as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.entries.update(data["entries"])
+        except (OSError, ValueError, KeyError, AttributeError):
+            # A missing or corrupted cache only means we have to scan everything again.
+            pass
+
+    def save(self):
+        if not self.modified:
+            return
+
+        temporary_file = self.cache_file + ".tmp"
+        with open(temporary_file, "w", encoding=ENCODING) as f:
+            json.dump({"version": self.VERSION, "entries": self.entries}, f)
+        os.replace(temporary_file, self.cache_file)
+        self.modified = False
+
+
+def scan_file(kind, file_name, cached_entry=None):
+    """Reads the file and returns a cache entry holding its ids"""
+
+    stat = os.stat(file_name)
+    content = read_binary_file(file_name)
+    digest = hashlib.sha256(content).hexdigest()
+    if cached_entry is not None and cached_entry["hash"] == digest:
+        ids = cached_entry["ids"]
+    else:
+        ids = extract_ids(kind, file_name, content)
+
+    return {"mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": digest, "ids": ids}
+
+
+def scan_files(kind, file_names, cache=None):
+    """
+    Returns a list with the ids of every given file.
+    Files unchanged since they were cached are not read again, the others are scanned
+    in parallel if there are enough of them.
+    """
+
+    entries = cache.entries[kind] if cache is not None else {}
+    results = [None] * len(file_names)
+    stale = []
+    for k, file_name in enumerate(file_names):
+        entry = entries.get(file_name)
+        if entry is not None:
+            stat = os.stat(file_name)
+            if entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                results[k] = entry["ids"]
+                continue
+        stale.append(k)
+
+    stale_file_names = [file_names[k] for k in stale]
+    stale_entries = [entries.get(file_name) for file_name in stale_file_names]
+    if len(stale) >= PARALLEL_SCAN_THRESHOLD and (os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor() as executor:
+            scanned = list(executor.map(scan_file, repeat(kind), stale_file_names, stale_entries, chunksize=32))
+    else:
+        scanned = list(map(scan_file, repeat(kind), stale_file_names, stale_entries))
+
+    for k, entry in zip(stale, scanned):
+        results[k] = entry["ids"]
+
+    if cache is not None:
+        updated_entries = dict(zip(stale_file_names, scanned))
+        if len(updated_entries) > 0 or entries.keys() != set(file_names):
+            # Rebuilding the entries also drops files that no longer exist.
+            cache.entries[kind] = {
+                file_name: updated_entries[file_name] if file_name in updated_entries else entries[file_name]
+                for file_name in file_names
+            }
+            cache.modified = True
+        cache.save()
+
+    return results
+
+
 def get_next_id(available_ids):
     assert len(available_ids) > 0, "Out of IDs"
     next_id = random.choice(list(available_ids))
@@ -69,6 +287,7 @@ def get_next_id(available_ids):
 
 def fix_ids_in_source_file(file_name, id_to_count, available_ids):
     source = read_file(file_name)
+    comment_spans = find_comment_spans(source)
 
     k = 0
     destination = []
@@ -79,7 +298,7 @@ def fix_ids_in_source_file(file_name, id_to_count, available_ids):
         id = m.group(0)[0:underscore_pos]
 
         # incorrect id or id has a duplicate somewhere
-        if not in_comment(source, m.start()) and (len(id) != 4 or id[0] == "0" or id_to_count[id] > 1):
+        if not in_comment(comment_spans, m.start()) and (len(id) != 4 or id[0] == "0" or id_to_count[id] > 1):
             assert id in id_to_count
             new_id = get_next_id(available_ids)
             assert new_id not in id_to_count
@@ -123,25 +342,38 @@ def find_files(top_dir, sub_dirs, extensions):
     return source_file_names
 
 
+def extract_ids_from_test_content(content):
+    """Returns a set with the ids of error expectations in the raw content of an isoltest file"""
+
+    expectations_start = TEST_EXPECTATIONS_START_PATTERN.search(content)
+    if expectations_start is None:
+        return set()
+    return {
+        m.group(1).decode(ENCODING)
+        for m in TEST_EXPECTATION_PATTERN.finditer(content, expectations_start.start())
+    }
+
+
 def find_ids_in_test_file(file_name):
-    source = read_file(file_name)
-    pattern = r"^// (.*Error|Warning|Info) \d\d\d\d:"
-    return {m.group(0)[-5:-1] for m in re.finditer(pattern, source, flags=re.MULTILINE)}
+    return extract_ids_from_test_content(read_binary_file(file_name))
 
 
-def find_ids_in_test_files(file_names):
+def find_ids_in_test_files(file_names, cache=None):
     """Returns a set containing all ids in tests"""
 
     ids = set()
-    for file_name in file_names:
-        ids |= find_ids_in_test_file(file_name)
+    if cache is None:
+        for file_name in file_names:
+            ids |= find_ids_in_test_file(file_name)
+        return ids
+
+    for file_ids in scan_files(TEST_FILES, file_names, cache):
+        ids.update(file_ids)
     return ids
 
 
 def find_ids_in_cmdline_test_err(file_name):
-    source = read_file(file_name)
-    pattern = r' \(\d\d\d\d\):'
-    return {m.group(0)[-6:-2] for m in re.finditer(pattern, source, flags=re.MULTILINE)}
+    return {m.group(1).decode(ENCODING) for m in CMDLINE_TEST_ERR_PATTERN.finditer(read_binary_file(file_name))}
 
 
 def print_ids(ids):
@@ -169,43 +401,14 @@ def print_ids_per_file(ids, id_to_file_names, top_dir):
         print()
 
 
-def examine_id_coverage(top_dir, source_id_to_file_names, new_ids_only=False):
-    test_sub_dirs = [
-        path.join("test", "libsolidity", "errorRecoveryTests"),
-        path.join("test", "libsolidity", "smtCheckerTests"),
-        path.join("test", "libsolidity", "syntaxTests"),
-        path.join("test", "libyul", "yulSyntaxTests")
-    ]
-    test_file_names = find_files(
-        top_dir,
-        test_sub_dirs,
-        [".sol", ".yul"]
-    )
+def examine_id_coverage(top_dir, source_id_to_file_names, new_ids_only=False, cache=None):
+    test_file_names = find_files(top_dir, TEST_SUB_DIRS, TEST_EXTENSIONS)
     source_ids = source_id_to_file_names.keys()
-    test_ids = find_ids_in_test_files(test_file_names)
-
-    # special case, we are interested in warnings which are ignored by regular tests:
-    # Warning (1878): SPDX license identifier not provided in source file. ....
-    # Warning (3420): Source file does not specify required compiler version!
-    test_ids |= find_ids_in_cmdline_test_err(path.join(top_dir, "test", "cmdlineTests", "error_codes", "err"))
-
-    # white list of ids which are not covered by tests
-    white_ids = {
-        "9804", # Tested in test/libyul/ObjectParser.cpp.
-        "1544",
-        "1749",
-        "2674",
-        "6367",
-        "8387",
-        "3805", # "This is a pre-release compiler version, please do not use it in production."
-                # The warning may or may not exist in a compiler build.
-        "4591", # "There are more than 256 warnings. Ignoring the rest."
-                # Due to 3805, the warning lists look different for different compiler builds.
-        "1834", # Unimplemented feature error, as we do not test it anymore via cmdLineTests
-        "5430"  # basefee being used in inline assembly for EVMVersion < london
-    }
-    assert len(test_ids & white_ids) == 0, "The sets are not supposed to intersect"
-    test_ids |= white_ids
+    test_ids = find_ids_in_test_files(test_file_names, cache)
+    test_ids |= find_ids_in_cmdline_test_err(path.join(top_dir, CMDLINE_TEST_ERR))
+
+    assert len(test_ids & WHITE_IDS) == 0, "The sets are not supposed to intersect"
+    test_ids |= WHITE_IDS
 
     test_only_ids = test_ids - source_ids
     source_only_ids = source_ids - test_ids
@@ -226,26 +429,16 @@ def examine_id_coverage(top_dir, source_id_to_file_names, new_ids_only=False):
             print("\n\nPlease make sure to add appropriate tests.")
             return False
 
-    old_source_only_ids = {
-        "1584", "1823",
-        "1988", "2066", "2833", "3356",
-        "3893", "3996", "4010", "4802",
-        "5272", "5622", "7128", "7400",
-        "7589", "7593", "7649", "7710",
-        "8065", "8084", "8140",
-        "8312", "8592", "9134", "9609",
-    }
-
-    new_source_only_ids = source_only_ids - old_source_only_ids
+    new_source_only_ids = source_only_ids - OLD_SOURCE_ONLY_IDS
     if len(new_source_only_ids) != 0:
         print("The following new error code(s), not covered by tests, found:")
         print_ids(new_source_only_ids)
         print(
             "\nYou can:\n"
             "- create appropriate test(s);\n"
-            "- add the error code(s) to old_source_only_ids in error_codes.py\n"
+            "- add the error code(s) to OLD_SOURCE_ONLY_IDS in error_codes.py\n"
             "  (to silence the checking script, with a promise to add a test later);\n"
-            "- add the error code(s) to white_ids in error_codes.py\n"
+            "- add the error code(s) to WHITE_IDS in error_codes.py\n"
             "  (for rare cases when the error is not supposed to be tested)"
         )
         return False
@@ -253,6 +446,170 @@ def examine_id_coverage(top_dir, source_id_to_file_names, new_ids_only=False):
     return True
 
 
+def find_id_problems(id, file_names):
+    """Returns a list of messages describing what is wrong with an id found in the given source files"""
+
+    problems = []
+    if len(id) != 4:
+        problems.append(f"ID {id} length != 4")
+    if id[0] == "0":
+        problems.append(f"ID {id} starts with zero")
+    if len(file_names) > 1:
+        problems.append(f"ID {id} appears {len(file_names)} times")
+    return problems
+
+
+def stat_files(file_names):
+    stats = {}
+    for file_name in file_names:
+        try:
+            stat = os.stat(file_name)
+        except OSError:
+            continue
+        stats[file_name] = (stat.st_mtime_ns, stat.st_size)
+    return stats
+
+
+class IdWatcher:  # pylint: disable=too-many-instance-attributes
+    """
+    Keeps the ids of all source and test files in memory and polls the files for changes.
+    Only the ids that appeared or disappeared in changed files are checked again.
+    """
+
+    def __init__(self, top_dir, cache=None):
+        self.top_dir = top_dir
+        self.cmdline_test_err = path.join(top_dir, CMDLINE_TEST_ERR)
+        self.source_ids = {}
+        self.test_ids = {}
+        self.id_to_file_names = {}
+        self.test_id_counts = Counter()
+
+        source_file_names = find_files(top_dir, SOURCE_SUB_DIRS, SOURCE_EXTENSIONS)
+        test_file_names = find_files(top_dir, TEST_SUB_DIRS, TEST_EXTENSIONS)
+        # Stat before scanning so that files saved in the meantime are picked up by the next poll.
+        self.stats = stat_files(source_file_names + test_file_names + [self.cmdline_test_err])
+
+        for file_name, ids in zip(source_file_names, scan_files(SOURCE_FILES, source_file_names, cache)):
+            self.add_file(file_name, ids)
+        for file_name, ids in zip(test_file_names, scan_files(TEST_FILES, test_file_names, cache)):
+            self.add_file(file_name, ids)
+        if self.cmdline_test_err in self.stats:
+            self.add_file(self.cmdline_test_err, find_ids_in_cmdline_test_err(self.cmdline_test_err))
+
+        self.problems = {}
+        for id in self.id_to_file_names:
+            problems = self.check_id(id)
+            if len(problems) > 0:
+                self.problems[id] = problems
+
+    def is_source_file(self, file_name):
+        return path.splitext(file_name)[1] in SOURCE_EXTENSIONS
+
+    def add_file(self, file_name, ids):
+        if self.is_source_file(file_name):
+            self.source_ids[file_name] = ids
+            add_source_ids(file_name, ids, self.id_to_file_names)
+        else:
+            self.test_ids[file_name] = set(ids)
+            self.test_id_counts.update(set(ids))
+        return set(ids)
+
+    def remove_file(self, file_name):
+        if file_name in self.source_ids:
+            ids = self.source_ids.pop(file_name)
+            for id in ids:
+                self.id_to_file_names[id].remove(file_name)
+                if len(self.id_to_file_names[id]) == 0:
+                    del self.id_to_file_names[id]
+            return set(ids)
+
+        ids = self.test_ids.pop(file_name, set())
+        self.test_id_counts.subtract(ids)
+        return ids
+
+    def rescan_file(self, file_name):
+        if file_name == self.cmdline_test_err:
+            return find_ids_in_cmdline_test_err(file_name)
+        kind = SOURCE_FILES if self.is_source_file(file_name) else TEST_FILES
+        return scan_file(kind, file_name)["ids"]
+
+    def check_id(self, id):
+        file_names = self.id_to_file_names.get(id, [])
+        if len(file_names) == 0:
+            return []
+
+        problems = find_id_problems(id, file_names)
+        if len(file_names) > 1:
+            problems[-1] += ": " + ", ".join(sorted(path.relpath(f, self.top_dir) for f in file_names))
+        if self.test_id_counts[id] <= 0 and id not in WHITE_IDS and id not in OLD_SOURCE_ONLY_IDS:
+            problems.append(f"ID {id} is not covered by tests")
+        return problems
+
+    def poll(self):
+        """
+        Rescans files that changed since the last poll and returns the list of changed files
+        together with lists of problems that appeared and disappeared because of the change.
+        """
+
+        file_names = (
+            find_files(self.top_dir, SOURCE_SUB_DIRS, SOURCE_EXTENSIONS) +
+            find_files(self.top_dir, TEST_SUB_DIRS, TEST_EXTENSIONS) +
+            [self.cmdline_test_err]
+        )
+        stats = stat_files(file_names)
+        changed_file_names = sorted(
+            {file_name for file_name, stat in stats.items() if self.stats.get(file_name) != stat} |
+            (self.stats.keys() - stats.keys())
+        )
+        self.stats = stats
+
+        affected_ids = set()
+        for file_name in changed_file_names:
+            affected_ids |= self.remove_file(file_name)
+            if file_name in stats:
+                try:
+                    affected_ids |= self.add_file(file_name, self.rescan_file(file_name))
+                except (OSError, UnicodeDecodeError):
+                    # Most likely caught in the middle of a save. It will be picked up by the next poll.
+                    del self.stats[file_name]
+
+        new_problems = []
+        fixed_problems = []
+        for id in sorted(affected_ids):
+            old = self.problems.pop(id, [])
+            new = self.check_id(id)
+            if len(new) > 0:
+                self.problems[id] = new
+            new_problems += [problem for problem in new if problem not in old]
+            fixed_problems += [problem for problem in old if problem not in new]
+
+        return changed_file_names, new_problems, fixed_problems
+
+    def run(self, interval):
+        print(f"Watching {len(self.source_ids)} source and {len(self.test_ids)} test files for changes.")
+        for id in sorted(self.problems):
+            for problem in self.problems[id]:
+                print(problem)
+
+        while True:
+            time.sleep(interval)
+            start = time.perf_counter()
+            changed_file_names, new_problems, fixed_problems = self.poll()
+            if len(changed_file_names) == 0:
+                continue
+
+            elapsed = (time.perf_counter() - start) * 1000
+            print()
+            for file_name in changed_file_names:
+                print(f"Changed: {path.relpath(file_name, self.top_dir)}")
+            for problem in new_problems:
+                print(f"  New:   {problem}")
+            for problem in fixed_problems:
+                print(f"  Fixed: {problem}")
+            total = sum(len(problems) for problems in self.problems.values())
+            print(f"{total} problem(s) remaining. Checked in {elapsed:.1f} ms.")
+
+
 def main(argv):
     # pylint: disable=too-many-branches, too-many-locals, too-many-statements
 
@@ -261,9 +618,19 @@ def main(argv):
     no_confirm = False
     examine_coverage = False
     next_id = False
-    opts, _args = getopt.getopt(argv, "", ["check", "fix", "no-confirm", "examine-coverage", "next"])
+    watch = False
+    poll_interval = DEFAULT_POLL_INTERVAL
+    cache_file = DEFAULT_CACHE_FILE_NAME
+    opts, _args = getopt.getopt(
+        argv,
+        "",
+        [
+            "check", "fix", "no-confirm", "examine-coverage", "next", "watch", "poll-interval=",
+            "cache-file=", "no-cache"
+        ]
+    )
 
-    for opt, _arg in opts:
+    for opt, arg in opts:
         if opt == "--check":
             check = True
         elif opt == "--fix":
@@ -274,40 +641,49 @@ def main(argv):
             examine_coverage = True
         elif opt == "--next":
             next_id = True
-
-    if [check, fix, examine_coverage, next_id].count(True) != 1:
-        print("usage: python error_codes.py --check | --fix [--no-confirm] | --examine-coverage | --next")
+        elif opt == "--watch":
+            watch = True
+        elif opt == "--poll-interval":
+            poll_interval = float(arg)
+        elif opt == "--cache-file":
+            cache_file = arg
+        elif opt == "--no-cache":
+            cache_file = None
+
+    if [check, fix, examine_coverage, next_id, watch].count(True) != 1:
+        print(
+            "usage: python error_codes.py --check | --fix [--no-confirm] | --examine-coverage | --next\n"
+            "                             | --watch [--poll-interval <seconds>]\n"
+            "                             [--cache-file <path> | --no-cache]"
+        )
         exit(1)
 
     cwd = os.getcwd()
+    cache = ScanCache(path.join(cwd, cache_file)) if cache_file is not None else None
 
-    source_file_names = find_files(
-        cwd,
-        ["libevmasm", "liblangutil", "libsolc", "libsolidity", "libsolutil", "libyul", "solc"],
-        [".h", ".cpp"]
-    )
-    source_id_to_file_names = find_ids_in_source_files(source_file_names)
+    if watch:
+        try:
+            IdWatcher(cwd, cache).run(poll_interval)
+        except KeyboardInterrupt:
+            exit(0)
+
+    source_file_names = find_files(cwd, SOURCE_SUB_DIRS, SOURCE_EXTENSIONS)
+    source_id_to_file_names = find_ids_in_source_files(source_file_names, cache)
 
     ok = True
     for id in sorted(source_id_to_file_names):
-        if len(id) != 4:
-            print(f"ID {id} length != 4")
-            ok = False
-        if id[0] == "0":
-            print(f"ID {id} starts with zero")
-            ok = False
-        if len(source_id_to_file_names[id]) > 1:
-            print(f"ID {id} appears {len(source_id_to_file_names[id])} times")
+        for problem in find_id_problems(id, source_id_to_file_names[id]):
+            print(problem)
             ok = False
 
     if examine_coverage:
         if not ok:
             print("Incorrect IDs have to be fixed before applying --examine-coverage")
             exit(1)
-        res = 0 if examine_id_coverage(cwd, source_id_to_file_names) else 1
+        res = 0 if examine_id_coverage(cwd, source_id_to_file_names, cache=cache) else 1
         exit(res)
 
-    ok &= examine_id_coverage(cwd, source_id_to_file_names, new_ids_only=True)
+    ok &= examine_id_coverage(cwd, source_id_to_file_names, new_ids_only=True, cache=cache)
 
     random.seed()
 
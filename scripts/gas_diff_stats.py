@@ -1,28 +1,65 @@
 """A script to collect gas statistics and print it.
 
-Useful to summarize gas differences to semantic tests for a PR / branch.
+Useful to summarize gas differences to semantic tests and gas estimation
+tests (``test/libsolidity/gasTests``) for a PR / branch.
 
-Dependencies: Parsec (https://pypi.org/project/parsec/) and Tabulate
-(https://pypi.org/project/tabulate/)
+Dependencies: Tabulate (https://pypi.org/project/tabulate/)
 
-  pip install parsec tabulate
+  pip install tabulate
 
 Run from root project dir.
 
   python3 scripts/gas_diff_stats.py
 
-Note that the changes to semantic tests have to be committed.
+Note that the changes to semantic tests have to be committed, unless they are
+compared against the working tree:
+
+  python3 scripts/gas_diff_stats.py --working-tree
 
 Assumes that there is a remote named ``origin`` pointing to the Solidity github
-repository. The changes are compared against ``origin/develop``.
+repository. The changes are compared against ``origin/develop``, other
+revisions can be chosen with ``--base`` and ``--head``.
+
+To follow the gas costs of every semantic test over a range of commits, use
+
+  python3 scripts/gas_diff_stats.py --history origin/develop~100..origin/develop
+
+which prints a JSON time series per test. Only the commits where the gas
+values of a test change are listed.
+
+The summary ends with aggregate metrics per codegen (geometric mean, median,
+90th and 99th percentile of the per-file changes and the number of files
+changed by more than ``--threshold`` percent). With ``--budget METRIC=PCT``
+the script exits with a non-zero status if a metric exceeds its budget for
+any codegen, e.g.
+
+  python3 scripts/gas_diff_stats.py --budget geomean=0.1 --budget p99=2 --budget above-threshold=5
+
+To see which calls became more or less expensive, use
+
+  python3 scripts/gas_diff_stats.py --per-call [--top N]
+
+which pairs every gas expectation with the call above it and lists the calls
+with the largest changes across all semantic tests.
 
 """
+import difflib
+import hashlib
+import json
+import math
+import re
+import statistics
 import subprocess
+import sys
+from argparse import ArgumentParser, ArgumentTypeError
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from enum import Enum
-from parsec import generate, ParseError, regex, string
 from tabulate import tabulate
 
+from isoltest_format import parse_test_file
+
 class Kind(Enum):
     IrOptimized = 1
     Legacy = 2
@@ -32,38 +69,43 @@ class Diff(Enum):
     Minus = 1
     Plus = 2
 
-minus = string("-").result(Diff.Minus)
-plus = string("+").result(Diff.Plus)
+DIFF_KINDS = {"-": Diff.Minus, "+": Diff.Plus}
+CODEGEN_KINDS = {
+    "irOptimized": Kind.IrOptimized,
+    "legacyOptimized": Kind.LegacyOptimized,
+    "legacy": Kind.Legacy,
+}
 
-space = string(" ")
-comment = string("//")
-colon = string(":")
+# Matches gas expectation lines in a diff, e.g.
+#
+# -// gas irOptimized: 138070
+#
+GAS_DIFF_REGEX = re.compile(r"([-+])// gas (irOptimized|legacyOptimized|legacy): ([0-9]+)")
 
-gas_ir_optimized = string("gas irOptimized").result(Kind.IrOptimized)
-gas_legacy_optimized = string("gas legacyOptimized").result(Kind.LegacyOptimized)
-gas_legacy = string("gas legacy").result(Kind.Legacy)
+# Matches gas expectation lines in a test file
+GAS_EXPECTATION_REGEX = re.compile(
+    r"^// gas (irOptimized|legacyOptimized|legacy): ([0-9]+)",
+    re.MULTILINE
+)
 
-def number() -> int:
-    """Parse number."""
-    return regex(r"([0-9]*)").parsecmap(int)
+SEMANTIC_TESTS_DIR = "test/libsolidity/semanticTests"
+GAS_TESTS_DIR = "test/libsolidity/gasTests"
 
-@generate
-def diff_string() -> (Kind, Diff, int):
-    """Usage: diff_string.parse(string)
+# Stands for the files on disk (working tree and index) where a git revision is expected
+WORKING_TREE = None
 
-    Example string:
+# Gas estimate of gasTests expectations that cannot be bounded, e.g. because of loops
+INFINITE = math.inf
 
-    -// gas irOptimized: 138070
+# Position of every codegen kind in the tuple returned by collect_gas()
+CODEGEN_INDEX = {codegen_kind: i for i, codegen_kind in enumerate(CODEGEN_KINDS)}
 
-    """
-    diff_kind = yield minus | plus
-    yield comment
-    yield space
-    codegen_kind = yield gas_ir_optimized ^ gas_legacy_optimized ^ gas_legacy
-    yield colon
-    yield space
-    val = yield number()
-    return (diff_kind, codegen_kind, val)
+# Position of every (diff kind, codegen kind) pair in the tuple returned by collect_statistics()
+STATISTICS_INDEX = {
+    (diff_kind, codegen_kind): i * len(CODEGEN_KINDS) + j
+    for i, diff_kind in enumerate(DIFF_KINDS)
+    for j, codegen_kind in enumerate(CODEGEN_KINDS)
+}
 
 def collect_statistics(lines) -> (int, int, int, int, int, int):
     """Returns
@@ -77,49 +119,487 @@ def collect_statistics(lines) -> (int, int, int, int, int, int):
     if not lines:
         raise Exception("Empty list")
 
-    def try_parse(line):
-        try:
-            return diff_string.parse(line)
-        except ParseError:
-            pass
+    totals = [0] * len(STATISTICS_INDEX)
+    match = GAS_DIFF_REGEX.match
+    for line in lines:
+        m = match(line)
+        if m is not None:
+            totals[STATISTICS_INDEX[m.group(1), m.group(2)]] += int(m.group(3))
+    return tuple(totals)
+
+def split_git_diff(lines):
+    """Splits the output of ``git diff --no-renames`` into per-file sections.
+
+    Yields ``(file name, lines)`` as soon as the section of a file is complete,
+    so that the output can be processed while git is still producing it.
+
+    """
+    header = "diff --git a/"
+    fname = None
+    section = []
+    for line in lines:
+        line = line.rstrip("\n")
+        if line.startswith(header):
+            if fname is not None:
+                yield fname, section
+            # Without renames the header is "diff --git a/<name> b/<name>".
+            paths = line[len(header):]
+            fname = paths[:(len(paths) - len(" b/")) // 2]
+            section = []
+        section.append(line)
+
+    if fname is not None:
+        yield fname, section
+
+def git_diff(base, head, directory):
+    """Runs a single ``git diff`` over the directory and yields its per-file
+    sections while the output is streamed.
+
+    """
+    command = [
+        "git", "-c", "core.quotePath=false",
+        "diff", "--unified=0", "--no-renames", base, head, "--", directory
+    ]
+    with subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True) as process:
+        yield from split_git_diff(process.stdout)
+        # git only reports errors before it produces any output, so they cannot fill the pipe.
+        error = process.stderr.read()
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command, stderr=error)
+
+def collect_gas(content) -> (int, int, int):
+    """Returns
+
+    (ir_optimized, legacy_optimized, legacy)
+
+    summed up over all gas expectations in the content of a test file.
+
+    """
+    totals = [0] * len(CODEGEN_KINDS)
+    for m in GAS_EXPECTATION_REGEX.finditer(content):
+        totals[CODEGEN_INDEX[m.group(1)]] += int(m.group(2))
+    return tuple(totals)
+
+class GitObjectReader:
+    """Reads git objects through a single long-lived ``git cat-file --batch`` process."""
+
+    def __init__(self):
+        # The process outlives __init__ and is closed in __exit__.
+        self.process = subprocess.Popen(  # pylint: disable=consider-using-with
+            ["git", "cat-file", "--batch"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.process.stdin.close()
+        self.process.wait()
+        self.process.stdout.close()
+
+    def read(self, name):
+        """Returns ``(sha, type, content)`` of the object or None if it does not exist."""
+        self.process.stdin.write(name.encode() + b"\n")
+        self.process.stdin.flush()
+        header = self.process.stdout.readline().split()
+        if len(header) != 3:
+            # "<name> missing" or "<name> ambiguous"
+            return None
+        sha, object_type, size = header
+        content = self.process.stdout.read(int(size))
+        self.process.stdout.read(1)
+        return sha.decode(), object_type.decode(), content
+
+def parse_tree(content):
+    """Yields ``(is_tree, name, sha)`` for every entry of a raw git tree object."""
+    pos = 0
+    while pos < len(content):
+        space = content.index(b" ", pos)
+        nul = content.index(b"\0", space)
+        mode = content[pos:space]
+        name = content[space + 1:nul].decode()
+        sha = content[nul + 1:nul + 21].hex()
+        pos = nul + 21
+        yield mode == b"40000", name, sha
+
+class GasHistory:
+    """Extracts the gas expectations of semantic tests from many commits.
+
+    Subtrees are listed and blobs are parsed only once per SHA, so only the
+    files that actually change between commits cost any work.
+
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self.tree_cache = {}
+        self.blob_cache = {}
+
+    def list_blobs(self, tree_sha, content=None):
+        """Returns a list of ``(path, blob sha)`` for all files in the tree, recursively."""
+        if tree_sha not in self.tree_cache:
+            if content is None:
+                _, _, content = self.reader.read(tree_sha)
+            blobs = []
+            for is_tree, name, sha in parse_tree(content):
+                if is_tree:
+                    blobs += [(name + "/" + path, blob_sha) for path, blob_sha in self.list_blobs(sha)]
+                else:
+                    blobs.append((name, sha))
+            self.tree_cache[tree_sha] = blobs
+        return self.tree_cache[tree_sha]
+
+    def gas(self, blob_sha):
+        if blob_sha not in self.blob_cache:
+            _, _, content = self.reader.read(blob_sha)
+            self.blob_cache[blob_sha] = collect_gas(content.decode("utf-8", errors="replace"))
+        return self.blob_cache[blob_sha]
+
+    def test_files(self, commit, directory):
+        """Returns a list of ``(path, blob sha)`` of all test files in the
+        directory at the given commit, with paths relative to the directory.
+
+        """
+        tree = self.reader.read(f"{commit}:{directory}")
+        if tree is None or tree[1] != "tree":
+            return []
+        tree_sha, _, content = tree
+        return [(path, blob_sha) for path, blob_sha in self.list_blobs(tree_sha, content) if path.endswith(".sol")]
+
+    def collect(self, commit, directory):
+        """Returns a dictionary with the gas values of every test in the directory
+        that has gas expectations at the given commit.
+
+        """
+        return {
+            path: gas
+            for path, blob_sha in self.test_files(commit, directory)
+            if any(gas := self.gas(blob_sha))
+        }
+
+def read_file_bytes(fname):
+    try:
+        with open(fname, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
         return None
 
-    out = [parsed for line in lines if (parsed := try_parse(line)) is not None]
-    diff_kinds = [Diff.Minus, Diff.Plus]
-    codegen_kinds = [Kind.IrOptimized, Kind.LegacyOptimized, Kind.Legacy]
-    return tuple(
-        sum([
-            val
-            for (diff_kind, codegen_kind, val) in out
-            if diff_kind == _diff_kind and codegen_kind == _codegen_kind
-        ])
-        for _diff_kind in diff_kinds
-        for _codegen_kind in codegen_kinds
+def read_text(reader, revision, fname):
+    """Returns the content of a file at a revision, or on disk for ``WORKING_TREE``.
+    Files that do not exist are empty.
+
+    """
+    if revision is WORKING_TREE:
+        content = read_file_bytes(fname)
+    else:
+        blob = reader.read(f"{revision}:{fname}")
+        content = blob[2] if blob is not None else None
+    return content.decode("utf-8", errors="replace") if content is not None else ""
+
+def git_blob_sha(content):
+    """Returns the SHA git would assign to a blob with the given content."""
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+def diff_lines(old_text, new_text):
+    """Returns the removed and added lines between two texts prefixed with
+    ``-`` and ``+``, like ``git diff --unified=0`` without the headers.
+
+    """
+    old_lines = old_text.splitlines()
+    new_lines = new_text.splitlines()
+    lines = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag != "equal":
+            lines += ["-" + line for line in old_lines[i1:i2]]
+            lines += ["+" + line for line in new_lines[j1:j2]]
+    return lines
+
+def working_tree_diff(reader, base, directory):
+    """Yields ``(file name, diff lines)`` for every test file in the directory
+    whose content on disk differs from the one at the base revision.
+
+    The files on disk are read and hashed in a thread pool; only files whose
+    hash differs from the base blob are read from git and diffed.
+
+    """
+    base_blobs = {
+        f"{directory}/{path}": blob_sha
+        for path, blob_sha in GasHistory(reader).test_files(base, directory)
+    }
+    # Sorted by path, the order in which ``git diff`` reports files.
+    fnames = sorted(path.as_posix() for path in Path(directory).rglob("*.sol"))
+
+    def read_and_hash(fname):
+        content = read_file_bytes(fname)
+        return content, git_blob_sha(content) if content is not None else None
+
+    with ThreadPoolExecutor() as executor:
+        files = list(executor.map(read_and_hash, fnames))
+
+    for fname, (content, blob_sha) in zip(fnames, files):
+        if content is None or base_blobs.get(fname) == blob_sha:
+            continue
+        old_text = read_text(reader, base, fname) if fname in base_blobs else ""
+        lines = diff_lines(old_text, content.decode("utf-8", errors="replace"))
+        # Files that differ only in line endings have no changed lines.
+        if lines:
+            yield fname, lines
+
+def verify_revisions(*revisions):
+    """Raises ``CalledProcessError`` if one of the revisions, except for
+    ``WORKING_TREE``, does not name a commit.
+
+    """
+    for revision in revisions:
+        if revision is not WORKING_TREE:
+            subprocess.run(
+                ["git", "rev-parse", "--verify", f"{revision}^{{commit}}"],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+                check=True
+            )
+
+def diff_files(reader, base, head, directory):
+    """Yields ``(file name, diff lines)`` for every file in the directory that
+    differs between the base and head revisions, where head may be ``WORKING_TREE``.
+
+    """
+    if head is WORKING_TREE:
+        yield from working_tree_diff(reader, base, directory)
+    else:
+        yield from git_diff(base, head, directory)
+
+def list_commits(revision_range):
+    """Returns ``(sha, commit timestamp)`` of all commits in the range, oldest first."""
+    output = subprocess.check_output(
+        ["git", "log", "--reverse", "--format=%H %ct", revision_range],
+        universal_newlines=True
     )
+    return [(sha, int(timestamp)) for sha, timestamp in (line.split() for line in output.splitlines())]
 
-def semantictest_statistics():
-    """Prints the tabulated statistics that can be pasted in github."""
-    def try_parse_git_diff(fname):
-        try:
-            diff_output = subprocess.check_output(
-                "git diff --unified=0 origin/develop HEAD " + fname,
-                shell=True,
-                universal_newlines=True
-            ).splitlines()
-            if diff_output:
-                return collect_statistics(diff_output)
-        except subprocess.CalledProcessError as e:
-            print("Error in the git diff:")
-            print(e.output)
-        return None
-    def stat(old, new):
-        return ((new - old) / old) * 100  if old else 0
+def semantictest_history(revision_range):
+    """Prints a JSON time series of the gas values of every semantic test.
 
-    table = []
+    For each test only the commits at which its values change (or at which it
+    appears or disappears) are listed.
 
-    for path in Path("test/libsolidity/semanticTests").rglob("*.sol"):
+    """
+    history = {}
+    last_values = {}
+    with GitObjectReader() as reader:
+        gas_history = GasHistory(reader)
+        for commit, timestamp in list_commits(revision_range):
+            values = gas_history.collect(commit, SEMANTIC_TESTS_DIR)
+            for test in values.keys() | last_values.keys():
+                gas = values.get(test)
+                if gas != last_values.get(test):
+                    history.setdefault(test, []).append({
+                        "commit": commit,
+                        "timestamp": timestamp,
+                        **{
+                            codegen_kind: (gas[i] if gas is not None else None)
+                            for i, codegen_kind in enumerate(CODEGEN_KINDS)
+                        },
+                    })
+            last_values = values
+
+    json.dump(dict(sorted(history.items())), sys.stdout, indent=4)
+    print()
+
+def parse_call_gas(content):
+    """Returns a dictionary mapping every call in the expectations section of a
+    test file to the gas costs recorded below it.
+
+    Calls are identified by their call line up to the expected result,
+    numbered to tell repeated identical calls apart, e.g. ``("f(uint256): 1", 0)``.
+    The gas costs are a dictionary from codegen kind to gas.
+
+    """
+    calls = {}
+    occurrences = Counter()
+    call = None
+    for line in parse_test_file(content).expectations:
+        if not line.startswith("// "):
+            continue
+
+        m = GAS_EXPECTATION_REGEX.match(line)
+        if m is not None:
+            if call is not None:
+                calls.setdefault(call, {})[m.group(1)] = int(m.group(2))
+        elif not line.startswith(("// ~ ", "// gas ")):
+            # Anything that is neither a gas expectation nor an event is a call. Gas
+            # expectations of other kinds (e.g. code deposit costs) are not compared.
+            text = line[len("// "):].split(" -> ")[0].rstrip()
+            call = (text, occurrences[text])
+            occurrences[text] += 1
+    return calls
+
+def call_gas_changes(fname, old_content, new_content):
+    """Yields ``(fname, call, codegen kind, old gas, new gas)`` for every call
+    whose gas cost changed between two versions of a test file.
+
+    """
+    old_calls = parse_call_gas(old_content)
+    new_calls = parse_call_gas(new_content)
+    for call, new_gas in new_calls.items():
+        old_gas = old_calls.get(call, {})
+        for codegen_kind in CODEGEN_KINDS:
+            if codegen_kind in old_gas and codegen_kind in new_gas and old_gas[codegen_kind] != new_gas[codegen_kind]:
+                yield fname, call[0], codegen_kind, old_gas[codegen_kind], new_gas[codegen_kind]
+
+def semantictest_call_statistics(top, base="origin/develop", head="HEAD"):
+    """Prints the calls of all semantic tests whose gas costs changed the most."""
+    verify_revisions(base, head)
+    changes = []
+    with GitObjectReader() as reader:
+        for fname, diff_output in diff_files(reader, base, head, SEMANTIC_TESTS_DIR):
+            if not any(GAS_DIFF_REGEX.match(line) for line in diff_output):
+                continue
+            changes += call_gas_changes(
+                fname.split('/', 3)[-1],
+                read_text(reader, base, fname),
+                read_text(reader, head, fname)
+            )
+
+    if not changes:
+        print("No differences found.")
+        return
+
+    def row(change):
+        fname, call, codegen_kind, old, new = change
+        return [fname, call, codegen_kind, old, new, new - old, f"{(new - old) / old * 100:+.2f}" if old else "-"]
+
+    table_header = ["File name", "Call", "Codegen", "Old", "New", "Change", "Change (%)"]
+    changes.sort(key=lambda change: change[4] - change[3])
+    regressions = [row(change) for change in reversed(changes) if change[4] > change[3]][:top]
+    improvements = [row(change) for change in changes if change[4] < change[3]][:top]
+
+    print(f"{len(changes)} gas expectations of calls changed.\n")
+    for title, table in [("Top regressions", regressions), ("Top improvements", improvements)]:
+        if table:
+            print(f"<details><summary>{title}</summary>\n")
+            print(tabulate(table, headers=table_header, tablefmt="github"))
+            print("</details>\n")
+
+def stat(old, new):
+    return ((new - old) / old) * 100  if old else 0
+
+# Metrics reported by ``aggregate_metrics()`` that can be given a budget
+METRICS = ["geomean", "median", "p90", "p99", "above-threshold"]
+
+def aggregate_metrics(changes, threshold):
+    """Returns
+
+    a dictionary with the aggregate metrics of a list of ``(old gas, new gas)``
+    pairs: the geometric mean, median, 90th and 99th percentile of the change
+    in percent and the number of pairs that changed by more than ``threshold``
+    percent. Pairs where either value is zero have no meaningful ratio and are
+    not included; their number is reported as ``skipped``.
+
+    """
+    ratios = [new / old for old, new in changes if old != 0 and new != 0]
+    percentages = sorted((ratio - 1) * 100 for ratio in ratios)
+    metrics = {"files": len(ratios), "skipped": len(changes) - len(ratios)}
+    if not ratios:
+        return metrics
+    if len(percentages) > 1:
+        percentiles = statistics.quantiles(percentages, n=100, method="inclusive")
+    else:
+        percentiles = percentages * 99
+    metrics.update({
+        "geomean": (statistics.geometric_mean(ratios) - 1) * 100,
+        "median": statistics.median(percentages),
+        "p90": percentiles[89],
+        "p99": percentiles[98],
+        "above-threshold": sum(1 for percentage in percentages if percentage > threshold),
+    })
+    return metrics
+
+def budget_violations(metrics_per_codegen, budgets):
+    """Returns a list of messages for every metric of every codegen that exceeds its budget."""
+    return [
+        f"{codegen_kind}: {metric} is {metrics[metric]:.4g}, the budget is {budget:g}"
+        for codegen_kind, metrics in metrics_per_codegen.items()
+        for metric, budget in budgets.items()
+        if metric in metrics and metrics[metric] > budget
+    ]
+
+def parse_gas_test_expectations(content):
+    """Returns a dictionary mapping ``(group, name)`` to the estimated gas for
+    all expectations of a gasTests file, e.g.
+
+    // creation:
+    //   codeDepositCost: 1243000
+    // external:
+    //   a(): 2430
+    //   b(uint256): infinite
+
+    Estimates that are ``infinite`` are represented by ``INFINITE``.
+
+    """
+    expectations = {}
+    group = None
+    for line in parse_test_file(content).expectations:
+        if not line.startswith("// "):
+            continue
+
+        entry = line[len("// "):].strip()
+        if entry.endswith(":"):
+            group = entry[:-1].strip()
+        elif group is not None:
+            name, _, value = entry.partition(":")
+            value = value.strip()
+            expectations[(group, name.strip())] = INFINITE if value == "infinite" else int(value)
+    return expectations
+
+def gastest_changes(reader, base="origin/develop", head="HEAD"):
+    """Returns a list of ``(fname, group, name, old gas, new gas)`` for every
+    gasTests expectation that differs between two revisions.
+
+    """
+    changes = []
+    for fname, _ in diff_files(reader, base, head, GAS_TESTS_DIR):
+        old = parse_gas_test_expectations(read_text(reader, base, fname))
+        new = parse_gas_test_expectations(read_text(reader, head, fname))
+        changes += [
+            (fname.split('/', 3)[-1], group, name, old[group, name], new[group, name])
+            for group, name in new
+            if (group, name) in old and old[group, name] != new[group, name]
+        ]
+    return changes
+
+def format_gas(gas):
+    return "infinite" if gas == INFINITE else str(gas)
+
+def summary_row(title, changes):
+    """Aggregates ``(old, new)`` pairs into a row of the summary table.
+    Infinite estimates cannot be summed and are only counted.
+
+    """
+    finite = [(old, new) for old, new in changes if INFINITE not in (old, new)]
+    old_total = sum(old for old, _ in finite)
+    new_total = sum(new for _, new in finite)
+    return [
+        title,
+        len(changes),
+        old_total,
+        new_total,
+        str(stat(old_total, new_total)),
+        sum(1 for old, new in changes if old != INFINITE and new == INFINITE),
+        sum(1 for old, new in changes if old == INFINITE and new != INFINITE),
+    ]
+
+def semantic_test_table(gas_per_file):
+    """Returns the rows of the table of changes per semantic test and the statistics of the changed tests."""
+    table = []
+    semantic_changes = []
+    for path in Path(SEMANTIC_TESTS_DIR).rglob("*.sol"):
         fname = path.as_posix()
-        parsed = try_parse_git_diff(fname)
+        parsed = gas_per_file.get(fname)
         if parsed is None:
             continue
         ir_optimized = stat(parsed[0], parsed[3])
@@ -127,14 +607,205 @@ def semantictest_statistics():
         legacy = stat(parsed[2], parsed[5])
         fname = fname.split('/', 3)[-1]
         table += [map(str, [fname, ir_optimized, legacy_optimized, legacy])]
+        semantic_changes.append(parsed)
+    return table, semantic_changes
+
+def group_changes_per_codegen(semantic_changes):
+    """Returns the ``(old, new)`` gas pairs of the changed semantic tests per codegen."""
+    # Gas values that do not appear in the diff of a file are reported as zero and skipped here.
+    return {
+        codegen_kind: [
+            (parsed[i], parsed[i + len(CODEGEN_KINDS)])
+            for parsed in semantic_changes
+            if parsed[i] != 0 or parsed[i + len(CODEGEN_KINDS)] != 0
+        ]
+        for i, codegen_kind in enumerate(CODEGEN_KINDS)
+    }
+
+def print_gas_test_table(gas_test_changes):
+    print("<details><summary>Click for a table of gas estimation differences</summary>\n")
+    table_header = ["File name", "Kind", "Function", "Old", "New", "Change (%)"]
+    print(tabulate(
+        [
+            [
+                fname, group, name, format_gas(old), format_gas(new),
+                str(stat(old, new)) if INFINITE not in (old, new) else "-"
+            ]
+            for fname, group, name, old, new in gas_test_changes
+        ],
+        headers=table_header,
+        tablefmt="github"
+    ))
+    print("</details>")
+
+def print_summary(changes_per_codegen, gas_test_changes):
+    summary = [
+        summary_row(f"semanticTests {codegen_kind}", changes)
+        for codegen_kind, changes in changes_per_codegen.items()
+    ]
+    gas_test_groups = {}
+    for _, group, name, old, new in gas_test_changes:
+        title = f"gasTests {group}: {name}" if group == "creation" else f"gasTests {group}"
+        gas_test_groups.setdefault(title, []).append((old, new))
+    summary += [summary_row(title, changes) for title, changes in sorted(gas_test_groups.items())]
+
+    print("\n<details><summary>Click for a summary of gas differences</summary>\n")
+    table_header = ["", "Changed", "Old total", "New total", "Change (%)", "Became infinite", "Became finite"]
+    print(tabulate(summary, headers=table_header, tablefmt="github"))
+    print("</details>")
+
+def print_metrics(metrics_per_codegen, threshold):
+    print("\n<details><summary>Click for aggregate metrics of gas differences</summary>\n")
+    table_header = [
+        "Codegen", "Files", "Geometric mean (%)", "Median (%)", "p90 (%)", "p99 (%)",
+        f"Above {threshold:g}%", "Skipped"
+    ]
+    print(tabulate(
+        [
+            [
+                codegen_kind, metrics["files"],
+                *(metrics.get(metric, "-") for metric in METRICS),
+                metrics["skipped"]
+            ]
+            for codegen_kind, metrics in metrics_per_codegen.items()
+        ],
+        headers=table_header,
+        tablefmt="github"
+    ))
+    print("</details>")
+
+def semantictest_statistics(base="origin/develop", head="HEAD", threshold=1.0):
+    """Prints the tabulated statistics that can be pasted in github and returns
+    the aggregate metrics of the semantic tests per codegen.
+
+    """
+    verify_revisions(base, head)
+    gas_per_file = {}
+    with GitObjectReader() as reader:
+        for fname, diff_output in diff_files(reader, base, head, SEMANTIC_TESTS_DIR):
+            gas_per_file[fname] = collect_statistics(diff_output)
+        gas_test_changes = gastest_changes(reader, base, head)
+
+    table, semantic_changes = semantic_test_table(gas_per_file)
+    if not table and not gas_test_changes:
+        print("No differences found.")
+        return {}
 
     if table:
         print("<details><summary>Click for a table of gas differences</summary>\n")
         table_header = ["File name", "IR-optimized (%)", "Legacy-Optimized (%)", "Legacy (%)"]
         print(tabulate(table, headers=table_header, tablefmt="github"))
         print("</details>")
-    else:
-        print("No differences found.")
+
+    if gas_test_changes:
+        print_gas_test_table(gas_test_changes)
+
+    changes_per_codegen = group_changes_per_codegen(semantic_changes)
+    print_summary(changes_per_codegen, gas_test_changes)
+
+    metrics_per_codegen = {
+        codegen_kind: aggregate_metrics(changes, threshold)
+        for codegen_kind, changes in changes_per_codegen.items()
+    }
+    print_metrics(metrics_per_codegen, threshold)
+    return metrics_per_codegen
+
+def parse_budget(value):
+    metric, separator, budget = value.partition("=")
+    if not separator or metric not in METRICS:
+        raise ArgumentTypeError(f"Expected METRIC=PCT with METRIC one of {', '.join(METRICS)}.")
+    try:
+        return metric, float(budget)
+    except ValueError as exception:
+        raise ArgumentTypeError(f"Invalid budget: {budget}") from exception
+
+def parse_command_line():
+    parser = ArgumentParser(description="Collects gas statistics of semantic tests and gas estimation tests.")
+    parser.add_argument(
+        "--base",
+        dest="base",
+        default="origin/develop",
+        help="Revision to compare against (default: origin/develop)."
+    )
+    parser.add_argument(
+        "--head",
+        dest="head",
+        default="HEAD",
+        help="Revision to compare (default: HEAD)."
+    )
+    parser.add_argument(
+        "--working-tree",
+        dest="working_tree",
+        default=False,
+        action="store_true",
+        help="Compare the files on disk, including uncommitted changes, instead of the head revision."
+    )
+    parser.add_argument(
+        "--history",
+        dest="revision_range",
+        metavar="RANGE",
+        help=(
+            "Instead of comparing origin/develop and HEAD, print the gas values of every test "
+            "at every commit in the given revision range (e.g. origin/develop~100..origin/develop)."
+        )
+    )
+    parser.add_argument(
+        "--per-call",
+        dest="per_call",
+        default=False,
+        action="store_true",
+        help="Attribute gas changes to individual calls and list the largest regressions and improvements."
+    )
+    parser.add_argument(
+        "--top",
+        dest="top",
+        type=int,
+        default=20,
+        help="Number of regressions and improvements listed with --per-call."
+    )
+    parser.add_argument(
+        "--threshold",
+        dest="threshold",
+        type=float,
+        default=1.0,
+        metavar="PCT",
+        help="Change in percent above which a file counts towards the above-threshold metric (default: 1)."
+    )
+    parser.add_argument(
+        "--budget",
+        dest="budgets",
+        type=parse_budget,
+        action="append",
+        default=[],
+        metavar="METRIC=PCT",
+        help=(
+            f"Exit with a non-zero status if the metric exceeds the budget for any codegen. "
+            f"METRIC is one of {', '.join(METRICS)}. Can be given multiple times."
+        )
+    )
+    return parser.parse_args()
+
+def main():
+    options = parse_command_line()
+    head = WORKING_TREE if options.working_tree else options.head
+    try:
+        if options.revision_range is not None:
+            semantictest_history(options.revision_range)
+            return 0
+        if options.per_call:
+            semantictest_call_statistics(options.top, options.base, head)
+            return 0
+        metrics_per_codegen = semantictest_statistics(options.base, head, options.threshold)
+    except subprocess.CalledProcessError as e:
+        # A failing git command must not look like a diff without changes, which would pass any budget.
+        print("Error in the git diff:", file=sys.stderr)
+        print(e.stderr, file=sys.stderr)
+        return 1
+
+    violations = budget_violations(metrics_per_codegen, dict(options.budgets))
+    for violation in violations:
+        print(f"Gas budget exceeded: {violation}", file=sys.stderr)
+    return 1 if violations else 0
 
 if __name__ == "__main__":
-    semantictest_statistics()
+    sys.exit(main())
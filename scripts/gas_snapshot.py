@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+
+"""A tool to store the gas expectations of semantic tests in an SQLite database.
+
+Every gas expectation (per test, per call and per codegen kind) of a commit is
+stored in a snapshot tagged with the commit id. Snapshots are incremental:
+test files are identified by their blob hash and a file that is already in the
+database is never parsed again. Different views of the same gas data can then
+be queried without re-diffing git history.
+
+Dependencies: Tabulate (https://pypi.org/project/tabulate/)
+
+  pip install tabulate
+
+Run from root project dir.
+
+  python3 scripts/gas_snapshot.py take origin/develop
+  python3 scripts/gas_snapshot.py take HEAD
+  python3 scripts/gas_snapshot.py list
+  python3 scripts/gas_snapshot.py compare origin/develop HEAD --top 20
+  python3 scripts/gas_snapshot.py history array/copying/array_copy_calldata_storage.sol [--call CALL]
+
+Snapshots can be referred to by the revision they were taken from, their
+commit id (or a prefix of it) or their tag (see ``take --tag``).
+
+"""
+
+import sqlite3
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from tabulate import tabulate
+
+from gas_diff_stats import GasHistory, GitObjectReader, SEMANTIC_TESTS_DIR, parse_call_gas
+
+DEFAULT_DATABASE = ".gas_snapshots.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    commit_sha TEXT NOT NULL UNIQUE,
+    tag TEXT,
+    created INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    sha TEXT PRIMARY KEY
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS expectations (
+    blob TEXT NOT NULL,
+    call TEXT NOT NULL,
+    occurrence INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    gas INTEGER NOT NULL,
+    PRIMARY KEY (blob, call, occurrence, kind)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS snapshot_files (
+    snapshot INTEGER NOT NULL REFERENCES snapshots (id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    blob TEXT NOT NULL,
+    PRIMARY KEY (snapshot, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS snapshot_files_by_path ON snapshot_files (path, snapshot);
+CREATE INDEX IF NOT EXISTS snapshot_files_by_blob ON snapshot_files (blob);
+"""
+
+class SnapshotError(Exception):
+    pass
+
+def open_database(path):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.executescript(SCHEMA)
+    return connection
+
+def resolve_commit(revision):
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--verify", "--quiet", f"{revision}^{{commit}}"],
+            universal_newlines=True
+        ).strip()
+    except subprocess.CalledProcessError:
+        return None
+
+def find_snapshot(connection, name):
+    """Returns the id of the snapshot referred to by a tag, commit id prefix or revision."""
+    rows = connection.execute(
+        "SELECT id FROM snapshots WHERE tag = ? OR commit_sha LIKE ? || '%'",
+        (name, name)
+    ).fetchall()
+    if len(rows) == 0:
+        commit = resolve_commit(name)
+        if commit is not None:
+            rows = connection.execute("SELECT id FROM snapshots WHERE commit_sha = ?", (commit,)).fetchall()
+    if len(rows) == 0:
+        raise SnapshotError(f"No snapshot found for '{name}'.")
+    if len(rows) > 1:
+        raise SnapshotError(f"'{name}' refers to more than one snapshot.")
+    return rows[0][0]
+
+def take_snapshot(connection, revision, tag=None):
+    """Stores the gas expectations of all semantic tests at the given revision.
+
+    Returns the commit id and the number of files that had to be parsed.
+
+    """
+    commit = resolve_commit(revision)
+    if commit is None:
+        raise SnapshotError(f"Unknown revision '{revision}'.")
+
+    with connection, GitObjectReader() as reader:
+        test_files = GasHistory(reader).test_files(commit, SEMANTIC_TESTS_DIR)
+        known_blobs = {sha for (sha,) in connection.execute("SELECT sha FROM blobs")}
+
+        parsed = 0
+        for _, blob_sha in test_files:
+            if blob_sha in known_blobs:
+                continue
+            _, _, content = reader.read(blob_sha)
+            calls = parse_call_gas(content.decode("utf-8", errors="replace"))
+            connection.execute("INSERT INTO blobs (sha) VALUES (?)", (blob_sha,))
+            connection.executemany(
+                "INSERT INTO expectations (blob, call, occurrence, kind, gas) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (blob_sha, call, occurrence, kind, gas)
+                    for (call, occurrence), gas_per_kind in calls.items()
+                    for kind, gas in gas_per_kind.items()
+                ]
+            )
+            known_blobs.add(blob_sha)
+            parsed += 1
+
+        connection.execute("DELETE FROM snapshots WHERE commit_sha = ?", (commit,))
+        snapshot = connection.execute(
+            "INSERT INTO snapshots (commit_sha, tag, created) VALUES (?, ?, ?)",
+            (commit, tag, int(time.time()))
+        ).lastrowid
+        connection.executemany(
+            "INSERT INTO snapshot_files (snapshot, path, blob) VALUES (?, ?, ?)",
+            [(snapshot, path, blob_sha) for path, blob_sha in test_files]
+        )
+
+    return commit, len(test_files), parsed
+
+def list_snapshots(connection):
+    return connection.execute("""
+        SELECT s.commit_sha, s.tag, datetime(s.created, 'unixepoch'), COUNT(e.gas)
+        FROM snapshots s
+        LEFT JOIN snapshot_files f ON f.snapshot = s.id
+        LEFT JOIN expectations e ON e.blob = f.blob
+        GROUP BY s.id
+        ORDER BY s.created, s.id
+    """).fetchall()
+
+def compare_snapshots(connection, old_snapshot, new_snapshot, top):
+    """Returns the gas expectations with the largest absolute change between two snapshots."""
+    return connection.execute("""
+        SELECT n.path, en.call, en.kind, eo.gas, en.gas, en.gas - eo.gas AS delta
+        FROM snapshot_files o
+        JOIN snapshot_files n ON n.snapshot = ? AND n.path = o.path AND n.blob != o.blob
+        JOIN expectations eo ON eo.blob = o.blob
+        JOIN expectations en ON
+            en.blob = n.blob AND
+            en.call = eo.call AND
+            en.occurrence = eo.occurrence AND
+            en.kind = eo.kind
+        WHERE o.snapshot = ? AND en.gas != eo.gas
+        ORDER BY ABS(delta) DESC, n.path, en.call, en.kind
+        LIMIT ?
+    """, (new_snapshot, old_snapshot, top)).fetchall()
+
+def gas_history(connection, path, call=None):
+    """Returns the gas of every call of a test (or of a single call) in every snapshot."""
+    return connection.execute("""
+        SELECT s.commit_sha, s.tag, e.call, e.occurrence, e.kind, e.gas
+        FROM snapshot_files f
+        JOIN snapshots s ON s.id = f.snapshot
+        JOIN expectations e ON e.blob = f.blob
+        WHERE f.path = ? AND (? IS NULL OR e.call = ?)
+        ORDER BY e.call, e.occurrence, e.kind, s.created, s.id
+    """, (path, call, call)).fetchall()
+
+def parse_command_line():
+    parser = ArgumentParser(description="Stores and queries snapshots of the gas expectations of semantic tests.")
+    parser.add_argument(
+        "--database",
+        dest="database",
+        default=DEFAULT_DATABASE,
+        help=f"Path to the SQLite database (default: {DEFAULT_DATABASE})."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    take_parser = subparsers.add_parser("take", help="Take a snapshot of a revision.")
+    take_parser.add_argument("revision", nargs="?", default="HEAD")
+    take_parser.add_argument("--tag", dest="tag", help="A name to refer to the snapshot by.")
+
+    subparsers.add_parser("list", help="List all snapshots.")
+
+    compare_parser = subparsers.add_parser("compare", help="Show the biggest changes between two snapshots.")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--top", dest="top", type=int, default=20)
+
+    history_parser = subparsers.add_parser("history", help="Show the gas of a test across all snapshots.")
+    history_parser.add_argument("test", help=f"Path of the test relative to {SEMANTIC_TESTS_DIR}.")
+    history_parser.add_argument("--call", dest="call", help="Only show this call, e.g. 'f(uint256): 1'.")
+
+    return parser.parse_args()
+
+def main():
+    options = parse_command_line()
+    connection = open_database(options.database)
+
+    try:
+        if options.command == "take":
+            commit, file_count, parsed = take_snapshot(connection, options.revision, options.tag)
+            print(f"Snapshot of {commit}: {file_count} test files, {parsed} parsed.")
+        elif options.command == "list":
+            print(tabulate(
+                list_snapshots(connection),
+                headers=["Commit", "Tag", "Taken", "Expectations"],
+                tablefmt="github"
+            ))
+        elif options.command == "compare":
+            rows = compare_snapshots(
+                connection,
+                find_snapshot(connection, options.old),
+                find_snapshot(connection, options.new),
+                options.top
+            )
+            if rows:
+                print(tabulate(
+                    [
+                        [path, call, kind, old, new, delta, f"{delta / old * 100:+.2f}" if old else "-"]
+                        for path, call, kind, old, new, delta in rows
+                    ],
+                    headers=["File name", "Call", "Codegen", "Old", "New", "Change", "Change (%)"],
+                    tablefmt="github"
+                ))
+            else:
+                print("No differences found.")
+        elif options.command == "history":
+            rows = gas_history(connection, options.test, options.call)
+            if rows:
+                print(tabulate(
+                    [[commit[:10], tag or "", call, occurrence, kind, gas] for commit, tag, call, occurrence, kind, gas in rows],
+                    headers=["Commit", "Tag", "Call", "#", "Codegen", "Gas"],
+                    tablefmt="github"
+                ))
+            else:
+                print("No gas expectations found.")
+    except SnapshotError as e:
+        sys.exit(str(e))
+    finally:
+        connection.close()
+
+if __name__ == "__main__":
+    main()
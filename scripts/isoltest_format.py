@@ -0,0 +1,204 @@
+"""
+Parser for the file format of the tests run by isoltest (syntax tests, semantic tests, gas tests, ...).
+
+A test file consists of
+
+- one or more sources. Every source after the first one starts with a ``==== Source: name ====``
+  line; ``==== ExternalSource: name=path ====`` lines refer to files next to the test,
+- optionally settings, starting with a ``// ====`` line and followed by ``// key: value`` lines,
+- expectations, following a ``// ----`` line.
+
+``parse_test_file()`` follows TestCaseReader::parseSourcesAndSettingsWithLineNumber() in
+test/TestCaseReader.cpp and reads the content in a single pass. ``TestFileCache`` stores the
+parsed files of the test directory, so that tools processing thousands of test files only
+parse the files that changed since their last run.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+PROJECT_ROOT = Path(__file__).parents[1]
+DEFAULT_CACHE_FILE = PROJECT_ROOT / ".isoltest_cache.sqlite"
+
+SOURCE_DELIMITER_START = "==== Source:"
+EXTERNAL_SOURCE_DELIMITER_START = "==== ExternalSource:"
+SOURCE_DELIMITER_END = "===="
+COMMENT = "// "
+SETTINGS_DELIMITER = "// ===="
+EXPECTATIONS_DELIMITER = "// ----"
+
+
+class TestFileFormatError(Exception):
+    pass
+
+
+class TestFile(NamedTuple):
+    # Sources by name. The last one is the main source, a source before the first
+    # ``==== Source: ====`` line has an empty name.
+    sources: Dict[str, str]
+    # Paths of external sources relative to the test file, by source name
+    external_sources: Dict[str, str]
+    settings: Dict[str, str]
+    # Lines after the ``// ----`` line, including the ``// `` prefix
+    expectations: List[str]
+    # Line number of the first expectation
+    expectations_line: int
+
+
+def parse_external_source(line):
+    """Returns the source name and the path of a ``==== ExternalSource: name=path ====`` line."""
+    external_source = line[len(EXTERNAL_SOURCE_DELIMITER_START):-len(SOURCE_DELIMITER_END)].strip()
+    name, remapping, target = external_source.partition("=")
+    name = name.strip()
+    return name, target.strip() if remapping else name
+
+
+def parse_sources(lines):
+    """Returns the sources and external sources at the start of the lines and the index of the line following them."""
+    sources = {}
+    external_sources = {}
+    current_source_name = ""
+    current_source = []
+
+    end = len(lines)
+    for line_number, line in enumerate(lines):
+        if line.startswith(EXPECTATIONS_DELIMITER) or line.startswith(SETTINGS_DELIMITER):
+            end = line_number
+            break
+        if line.startswith(SOURCE_DELIMITER_START) and line.endswith(SOURCE_DELIMITER_END):
+            if current_source_name or current_source:
+                sources[current_source_name] = "".join(current_source)
+            current_source = []
+            current_source_name = line[len(SOURCE_DELIMITER_START):-len(SOURCE_DELIMITER_END)].strip()
+            if current_source_name in sources:
+                raise TestFileFormatError(f'Multiple definitions of test source "{current_source_name}".')
+        elif line.startswith(EXTERNAL_SOURCE_DELIMITER_START) and line.endswith(SOURCE_DELIMITER_END):
+            name, target = parse_external_source(line)
+            if name in sources or name in external_sources:
+                raise TestFileFormatError(f'Multiple definitions of test source "{name}".')
+            external_sources[name] = target
+        else:
+            current_source.append(line + "\n")
+
+    sources[current_source_name] = "".join(current_source)
+    return sources, external_sources, end
+
+
+def parse_settings(lines, start):
+    """Returns the settings in the lines from ``start`` on and the index of the ``// ----`` line following them."""
+    settings = {}
+    for line_number in range(start, len(lines)):
+        line = lines[line_number]
+        if line.startswith(EXPECTATIONS_DELIMITER):
+            return settings, line_number
+        if line.startswith(SETTINGS_DELIMITER):
+            continue
+        if not line.startswith(COMMENT):
+            raise TestFileFormatError('Expected "//" or "// ---" to terminate settings and source.')
+
+        key, colon, value = line[len(COMMENT):].partition(":")
+        if not colon:
+            raise TestFileFormatError('Expected ":" inside setting.')
+        settings[key.strip()] = value.strip()
+    return settings, len(lines)
+
+
+def parse_expectations(lines, delimiter_index):
+    """Returns the lines after the ``// ----`` line and the line number of the first of them."""
+    start = min(delimiter_index + 1, len(lines))
+    return lines[start:], start + 1
+
+
+def parse_test_file(content):
+    """Returns the ``TestFile`` with the sources, settings and expectations of the content of a test file."""
+    # Like std::getline() in TestCaseReader, only "\n" separates lines.
+    lines = content.split("\n")
+    if lines[-1] == "":
+        lines.pop()
+
+    sources, external_sources, settings_index = parse_sources(lines)
+    settings, expectations_index = parse_settings(lines, settings_index)
+    expectations, expectations_line = parse_expectations(lines, expectations_index)
+    return TestFile(sources, external_sources, settings, expectations, expectations_line)
+
+
+def read_external_sources(path, test_file):
+    """Returns the contents of the external sources of a test file by source name."""
+    test_dir = Path(path).parent
+    return {
+        name: (test_dir / target).read_bytes().decode("utf8")
+        for name, target in test_file.external_sources.items()
+    }
+
+
+def read_test_file(path):
+    # Decoding the bytes keeps "\r\n" line endings, as TestCaseReader does.
+    return parse_test_file(Path(path).read_bytes().decode("utf8"))
+
+
+class TestFileCache:
+    """
+    Persistent cache of parsed test files.
+
+    Entries are keyed by the path of a file. An entry is reused as is while the modification
+    time and size of the file stay the same. Otherwise the file is read again and only parsed
+    if the hash of its content has changed.
+    """
+
+    VERSION = 1
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS files (
+        path TEXT PRIMARY KEY,
+        mtime_ns INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        sha256 TEXT NOT NULL,
+        parsed TEXT NOT NULL
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, cache_file=DEFAULT_CACHE_FILE):
+        self.connection = sqlite3.connect(str(cache_file))
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] != self.VERSION:
+            self.connection.execute("DROP TABLE IF EXISTS files")
+            self.connection.execute(f"PRAGMA user_version = {self.VERSION}")
+        self.connection.executescript(self.SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def read(self, path):
+        """Returns the parsed test file, parsing it only if it is not in the cache or has changed."""
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        row = self.connection.execute(
+            "SELECT mtime_ns, size, sha256, parsed FROM files WHERE path = ?", (key,)
+        ).fetchone()
+        if row is not None and row[0] == stat.st_mtime_ns and row[1] == stat.st_size:
+            return TestFile(**json.loads(row[3]))
+
+        content = Path(key).read_bytes()
+        sha256 = hashlib.sha256(content).hexdigest()
+        if row is not None and row[2] == sha256:
+            test_file = TestFile(**json.loads(row[3]))
+        else:
+            test_file = parse_test_file(content.decode("utf8"))
+        self.connection.execute(
+            "INSERT OR REPLACE INTO files (path, mtime_ns, size, sha256, parsed) VALUES (?, ?, ?, ?, ?)",
+            (key, stat.st_mtime_ns, stat.st_size, sha256, json.dumps(test_file._asdict()))
+        )
+        return test_file
+
+    def save(self):
+        self.connection.commit()
+
+    def close(self):
+        self.save()
+        self.connection.close()
@@ -1,8 +1,13 @@
 #!/usr/bin/env python3
 
 from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import hashlib
+import json
 import sys
 import os
+import math
+import shutil
 import subprocess
 import re
 import glob
@@ -30,8 +35,157 @@ class PrintDotsThread:
             print(".")
             time.sleep(self.interval)
 
+def file_sha256(path):
+    """Returns the hex SHA-256 digest of the file content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+class RegressionCache:
+    """
+    Persistent record of the corpus inputs that passed, per fuzzer.
+
+    Inputs are identified by the hash of their content and are only considered
+    known good for the fuzzer binary with the recorded hash. A rebuilt fuzzer
+    binary discards the inputs recorded for the previous one.
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.fuzzers = {}
+        self.modified = False
+
+        try:
+            with open(cache_file, 'r', encoding='utf8') as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.fuzzers = {
+                    basename: {"binary": entry["binary"], "passed": set(entry["passed"])}
+                    for basename, entry in data["fuzzers"].items()
+                }
+        except (OSError, ValueError, KeyError, AttributeError, TypeError):
+            # A missing or corrupted cache only means that all inputs are run again.
+            pass
+
+    def passed(self, basename, binary_hash):
+        """Returns the set of hashes of inputs that passed with the fuzzer binary."""
+        entry = self.fuzzers.get(basename)
+        if entry is None or entry["binary"] != binary_hash:
+            return set()
+        return entry["passed"]
+
+    def add_passed(self, basename, binary_hash, input_hashes):
+        entry = self.fuzzers.get(basename)
+        if entry is None or entry["binary"] != binary_hash:
+            entry = self.fuzzers[basename] = {"binary": binary_hash, "passed": set()}
+        entry["passed"].update(input_hashes)
+        self.modified = True
+
+    def save(self):
+        if not self.modified:
+            return
+
+        data = {
+            "version": self.VERSION,
+            "fuzzers": {
+                basename: {"binary": entry["binary"], "passed": sorted(entry["passed"])}
+                for basename, entry in self.fuzzers.items()
+            },
+        }
+        temporary_file = self.cache_file + ".tmp"
+        with open(temporary_file, 'w', encoding='utf8') as f:
+            json.dump(data, f)
+        os.replace(temporary_file, self.cache_file)
+        self.modified = False
+
+class LogScanner:
+    """
+    Scans fuzzer output chunk by chunk for sanitizer errors and for the time
+    libFuzzer reports for every input it executed.
+
+    Only the last incomplete line is kept between chunks, so the memory used
+    does not depend on the size of the log.
+    """
+
+    _re_sanitizer_log = re.compile(rb"""ERROR: (libFuzzer|UndefinedBehaviorSanitizer)""")
+    _re_executed = re.compile(rb"""^Executed (.+) in (\d+) ms$""", re.MULTILINE)
+
+    # Longest incomplete line kept between chunks, longer lines are only scanned for errors
+    MAX_LINE_LENGTH = 1 << 16
+
+    def __init__(self):
+        self.failed = False
+        self.timings = {}
+        self._tail = b""
+
+    def _scan(self, text):
+        if not self.failed and self._re_sanitizer_log.search(text):
+            self.failed = True
+        for match in self._re_executed.finditer(text):
+            self.timings[match.group(1).decode('utf8', errors='replace')] = int(match.group(2))
+
+    def feed(self, chunk):
+        """
+        Args:
+            chunk (bytes): next part of the output
+
+        Returns:
+            bool: Whether a sanitizer error has been found so far.
+        """
+        text = self._tail + chunk
+        end = text.rfind(b"\n") + 1
+        self._scan(text[:end])
+        self._tail = text[end:]
+        if len(self._tail) > self.MAX_LINE_LENGTH:
+            if self._re_sanitizer_log.search(self._tail):
+                self.failed = True
+            # Keep enough of the line to match an error message split between chunks.
+            self._tail = self._tail[-256:]
+        return self.failed
+
+    def finish(self):
+        """Scans the last line if the output does not end with a newline."""
+        self._scan(self._tail)
+        self._tail = b""
+        return self.failed
+
+class FuzzerRun:
+    """Collects the results of the chunks of the corpus of a fuzzer, which run in parallel."""
+
+    def __init__(self, fuzzer, all_inputs, pending, binary_hash):
+        self.basename = os.path.basename(fuzzer)
+        self.all_inputs = all_inputs
+        # Inputs that are not known to pass with this fuzzer binary
+        self.pending = pending
+        self.binary_hash = binary_hash
+        self.remaining_chunks = 0
+        self.failed = []
+        self.times = []
+
+    def add_chunk(self, failed, start, end):
+        """Records the result of a chunk and returns whether it was the last one."""
+        self.failed += failed
+        self.times.append((start, end))
+        self.remaining_chunks -= 1
+        return self.remaining_chunks == 0
+
+    def wall_time(self):
+        if not self.times:
+            return 0
+        return max(end for _, end in self.times) - min(start for start, _ in self.times)
+
 class regressor:
-    _re_sanitizer_log = re.compile(r"""ERROR: (libFuzzer|UndefinedBehaviorSanitizer)""")
+    # Number of corpus inputs passed to a single fuzzer invocation
+    BATCH_SIZE = 256
+    # Number of chunks the corpora are split into per job, so that jobs
+    # running small chunks can pick up work while others run large ones
+    CHUNKS_PER_JOB = 4
+    # Size of the parts in which fuzzer output is read and scanned
+    LOG_CHUNK_SIZE = 1 << 16
 
     def __init__(self, description, args):
         self._description = description
@@ -40,57 +194,227 @@ class regressor:
         self._fuzzer_path = os.path.join(self._repo_root,
                                          "build/test/tools/ossfuzz")
         self._logpath = os.path.join(self._repo_root, "test_results")
+        if self._args.cache_file is None:
+            self._args.cache_file = os.path.join(self._repo_root, ".regressions_cache.json")
 
     def parseCmdLine(self, description, args):
         argParser = ArgumentParser(description)
         argParser.add_argument('-o', '--out-dir', required=True, type=str,
                                help="""Directory where test results will be written""")
+        argParser.add_argument('-j', '--jobs', type=int, default=os.cpu_count(),
+                               help="""Number of fuzzer invocations run in parallel
+                               (default: number of CPUs)""")
+        argParser.add_argument('--cache-file', type=str, default=None,
+                               help="""File recording the corpus inputs that passed with
+                               the current fuzzer binaries (default: .regressions_cache.json
+                               in the repository root)""")
+        argParser.add_argument('--force', action='store_true',
+                               help="""Run all corpus inputs, including those that passed
+                               with the same fuzzer binary before""")
+        argParser.add_argument('--slowest', type=int, default=10,
+                               help="""Number of corpus inputs with the longest execution
+                               time that are reported (default: 10)""")
         return argParser.parse_args(args)
 
     @staticmethod
-    def run_cmd(command, logfile=None, env=None):
+    def corpus_files(corpus_dir):
         """
         Args:
-            command (str): command to run
-            logfile (str): log file name
-            env (dict): dictionary holding key-value pairs for bash environment
-                    variables
+            corpus_dir (str): corpus directory
 
         Returns:
-            int: The exit status of the command. Exit status codes are:
-                0       -> Success
-                1-255   -> Failure
+            list: Paths of all files in the corpus directory, sorted.
         """
-        if not logfile:
-            logfile = os.devnull
+        return sorted(
+            os.path.join(root, name)
+            for root, _, names in os.walk(corpus_dir)
+            for name in names
+        )
 
-        if not env:
-            env = os.environ.copy()
+    def run_batch(self, fuzzer, inputs, logfile, timings):
+        """Runs the fuzzer once on all inputs, appending its output to the log.
+        The output is scanned while the fuzzer runs. A batch of several inputs
+        is stopped as soon as an error shows up since it gets bisected anyway.
+
+        Args:
+            fuzzer (str): fuzzer binary
+            inputs (list): corpus files
+            logfile (str): log file name
+            timings (dict): execution time in ms by input, updated with the
+                    times reported by the fuzzer
 
-        with open(logfile, 'w', encoding='utf8') as logfh:
-            with subprocess.Popen(command, shell=True, executable='/bin/bash',
-                                    env=env, stdout=logfh,
-                                    stderr=subprocess.STDOUT) as proc:
+        Returns:
+            bool: Test status.
+                True       -> All inputs succeeded
+                False      -> At least one input failed
+        """
+        scanner = LogScanner()
+        with open(logfile, 'ab') as logfh:
+            logfh.write(f"## Running {len(inputs)} input(s) starting with {inputs[0]}\n".encode('utf8'))
+            logfh.flush()
+            with subprocess.Popen([fuzzer, *inputs], stdout=subprocess.PIPE,
+                                  stderr=subprocess.STDOUT) as proc:
+                for chunk in iter(lambda: proc.stdout.read1(self.LOG_CHUNK_SIZE), b''):
+                    logfh.write(chunk)
+                    if scanner.feed(chunk) and len(inputs) > 1:
+                        proc.kill()
+                        break
                 ret = proc.wait()
-                logfh.close()
-                return ret
+        scanner.finish()
+        timings.update(scanner.timings)
+        return ret == 0 and not scanner.failed
+
+    def run_inputs(self, fuzzer, inputs, logfile, timings):
+        """Runs the fuzzer on the inputs in a single invocation. libFuzzer stops
+        at the first input that fails, so a failing batch is bisected until the
+        failing inputs are found.
 
-    def process_log(self, logfile):
+        Args:
+            fuzzer (str): fuzzer binary
+            inputs (list): corpus files
+            logfile (str): log file name
+            timings (dict): execution time in ms by input
+
+        Returns:
+            list: The inputs that failed. If the batch fails but none of its
+                halves does, the failure depends on the order of the inputs or
+                is flaky and the whole batch is reported.
         """
+        if self.run_batch(fuzzer, inputs, logfile, timings):
+            return []
+        if len(inputs) == 1:
+            return inputs
+        middle = len(inputs) // 2
+        failed = (
+            self.run_inputs(fuzzer, inputs[:middle], logfile, timings) +
+            self.run_inputs(fuzzer, inputs[middle:], logfile, timings)
+        )
+        if not failed:
+            with open(logfile, 'a', encoding='utf8') as logfh:
+                logfh.write(
+                    f"## {len(inputs)} input(s) starting with {inputs[0]} failed together, "
+                    "but not when split in halves. Reporting all of them.\n"
+                )
+            return inputs
+        return failed
+
+    def run_chunk(self, fuzzer, inputs, logfile):
+        """Runs the fuzzer on the inputs in batches.
+
         Args:
+            fuzzer (str): fuzzer binary
+            inputs (list): corpus files
             logfile (str): log file name
 
         Returns:
-            bool: Test status.
-                True       -> Success
-                False      -> Failure
+            tuple: The inputs that failed, the execution time in ms by input,
+                start and end time of the run.
         """
+        start = time.time()
+        # Truncate the log, batches append to it.
+        with open(logfile, 'w', encoding='utf8'):
+            pass
+        failed = []
+        timings = {}
+        for i in range(0, len(inputs), self.BATCH_SIZE):
+            failed += self.run_inputs(fuzzer, inputs[i:i + self.BATCH_SIZE], logfile, timings)
+        return failed, timings, start, time.time()
+
+    def schedule(self, corpora):
+        """Splits the corpora into chunks for parallel runs. Larger corpora are
+        split into more chunks and the largest chunks are scheduled first.
 
-        ## Log may contain non ASCII characters, so we simply stringify them
-        ## since they don't matter for regular expression matching
-        with open(logfile, 'rb', encoding=None) as f:
-            rawtext = str(f.read())
-        return not re.search(self._re_sanitizer_log, rawtext)
+        Args:
+            corpora (dict): corpus files by fuzzer binary
+
+        Returns:
+            list: Tuples of fuzzer binary, chunk index and corpus files.
+        """
+        total = sum(len(inputs) for inputs in corpora.values())
+        chunk_size = max(self.BATCH_SIZE, math.ceil(total / (self.CHUNKS_PER_JOB * self._args.jobs)))
+        chunks = [
+            (fuzzer, index, inputs[start:start + chunk_size])
+            for fuzzer, inputs in corpora.items()
+            for index, start in enumerate(range(0, len(inputs), chunk_size))
+        ]
+        return sorted(chunks, key=lambda chunk: len(chunk[2]), reverse=True)
+
+    def chunk_logfile(self, basename, index):
+        return os.path.join(self._logpath, f"{basename}.log.{index}")
+
+    @staticmethod
+    def merge_logs(logfile, chunk_logfiles):
+        """Concatenates the chunk logs in order into the fuzzer log and removes them."""
+        with open(logfile, 'wb') as logfh:
+            for chunk_logfile in chunk_logfiles:
+                with open(chunk_logfile, 'rb') as chunkfh:
+                    shutil.copyfileobj(chunkfh, logfh)
+                os.remove(chunk_logfile)
+
+    @staticmethod
+    def print_results(results):
+        """Prints a table with the status, number of inputs and wall time per fuzzer."""
+        rows = [("Fuzzer", "Status", "Inputs", "Cached", "Failed", "Wall time (s)")]
+        rows += [
+            (
+                basename, "passed" if not failed else "FAILED", str(inputs), str(cached),
+                str(len(failed)), f"{wall_time:.1f}"
+            )
+            for basename, (inputs, cached, failed, wall_time) in sorted(results.items())
+        ]
+        widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+        for row in rows:
+            print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+    @staticmethod
+    def print_slowest(timings, count):
+        """Prints the inputs with the longest execution time reported by the fuzzers."""
+        slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:count]
+        if not slowest:
+            return
+        print("")
+        print(f"Slowest {len(slowest)} input(s):")
+        width = len(str(slowest[0][1]))
+        for path, milliseconds in slowest:
+            print(f"\t{str(milliseconds).rjust(width)} ms  {path}")
+
+    def prepare_run(self, fuzzer, cache, input_hashes):
+        """Returns the FuzzerRun of a fuzzer with the inputs that are not known to pass."""
+        basename = os.path.basename(fuzzer)
+        all_inputs = self.corpus_files(f"/tmp/solidity-fuzzing-corpus/{basename}_seed_corpus")
+        binary_hash = file_sha256(fuzzer)
+        input_hashes.update((path, file_sha256(path)) for path in all_inputs)
+        known_good = set() if self._args.force else cache.passed(basename, binary_hash)
+        pending = [path for path in all_inputs if input_hashes[path] not in known_good]
+        return FuzzerRun(fuzzer, all_inputs, pending, binary_hash)
+
+    def finish_run(self, run, cache, input_hashes):
+        """Merges the logs of a fuzzer, records the inputs that passed and prints its result.
+
+        Returns:
+            tuple: The number of inputs, the number of cached inputs, the
+                inputs that failed and the wall time.
+        """
+        self.merge_logs(
+            os.path.join(self._logpath, f"{run.basename}.log"),
+            [self.chunk_logfile(run.basename, index) for index in range(len(run.times))]
+        )
+        run.failed.sort()
+        failed_inputs = set(run.failed)
+        cache.add_passed(
+            run.basename, run.binary_hash,
+            (input_hashes[path] for path in run.pending if path not in failed_inputs)
+        )
+        cache.save()
+        if run.failed:
+            print(
+                f"\t[-] libFuzzer reported failure for {run.basename}. "
+                "Failure logged to test_results")
+            for failed_input in run.failed:
+                print(f"\t\t{failed_input}")
+        else:
+            print(f"\t[+] {run.basename} passed regression tests.")
+        return len(run.all_inputs), len(run.all_inputs) - len(run.pending), run.failed, run.wall_time()
 
     def run(self):
         """
@@ -100,24 +424,40 @@ class regressor:
                 False      -> At least one test failed
         """
 
-        testStatus = []
-        for fuzzer in glob.iglob(f"{self._fuzzer_path}/*_ossfuzz"):
-            basename = os.path.basename(fuzzer)
-            logfile = os.path.join(self._logpath, f"{basename}.log")
-            corpus_dir = f"/tmp/solidity-fuzzing-corpus/{basename}_seed_corpus"
-            cmd = f"find {corpus_dir} -type f | xargs -n1 sh -c '{fuzzer} $0 || exit 255'"
-            self.run_cmd(cmd, logfile=logfile)
-            ret = self.process_log(logfile)
-            if not ret:
-                print(
-                    f"\t[-] libFuzzer reported failure for {basename}. "
-                    "Failure logged to test_results")
-                testStatus.append(False)
-            else:
-                print(f"\t[+] {basename} passed regression tests.")
-                testStatus.append(True)
-        return all(testStatus)
+        cache = RegressionCache(self._args.cache_file)
+        input_hashes = {}
+        runs = {
+            fuzzer: self.prepare_run(fuzzer, cache, input_hashes)
+            for fuzzer in sorted(glob.iglob(f"{self._fuzzer_path}/*_ossfuzz"))
+        }
+        chunks = self.schedule({fuzzer: run.pending for fuzzer, run in runs.items()})
+        for fuzzer, _, _ in chunks:
+            runs[fuzzer].remaining_chunks += 1
+        timings = {}
+        results = {}
+
+        for run in runs.values():
+            if run.remaining_chunks == 0:
+                results[run.basename] = self.finish_run(run, cache, input_hashes)
+        with ProcessPoolExecutor(max_workers=self._args.jobs) as executor:
+            futures = {
+                executor.submit(
+                    self.run_chunk, fuzzer, inputs,
+                    self.chunk_logfile(os.path.basename(fuzzer), index)
+                ): runs[fuzzer]
+                for fuzzer, index, inputs in chunks
+            }
+            for future in as_completed(futures):
+                run = futures[future]
+                chunk_failed, chunk_timings, *chunk_times = future.result()
+                timings.update(chunk_timings)
+                if run.add_chunk(chunk_failed, *chunk_times):
+                    results[run.basename] = self.finish_run(run, cache, input_hashes)
 
+        print("")
+        self.print_results(results)
+        self.print_slowest(timings, self._args.slowest)
+        return all(not failed_inputs for _, _, failed_inputs, _ in results.values())
 
 if __name__ == '__main__':
     dotprinter = PrintDotsThread()
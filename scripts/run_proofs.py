@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+
+"""
+Runs the proofs of the optimization rules in test/formal.
+
+Every Python file in test/formal except for the helper modules is a proof. Proofs run in
+parallel, each in its own Python process limited in time and memory. A proof passes if it exits
+successfully, fails if the solver finds a counterexample (or the proof crashes) and is unknown
+if the solver gives up or one of the limits is hit.
+
+Usage:
+
+  scripts/run_proofs.py [PROOF ...] [--changed-since REV] [--jobs N]
+
+proves all rules (or the given proofs) and prints a table with the status and solve time of
+every proof, followed by the output of the proofs that did not pass. With ``--changed-since``
+only the proofs that differ from the given revision are run, unless one of the helper modules
+changed, which requires proving all rules again.
+
+Proofs report the statistics of every solver check (see test/formal/rule.py). The table lists
+the number of checks, the time spent in the solver, its conflicts and its peak memory per proof,
+which shows which rules are expensive to prove.
+
+Results are cached by a hash of the proof, the helper modules it imports and the version of z3.
+Proofs whose inputs did not change are not run again; a cached counterexample is reported as if
+the proof had just failed. Proofs that ran into a limit or were killed by a signal are not cached.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parents[1]
+PROOF_DIR = REPO_ROOT / "test/formal"
+HELPER_MODULES = {"rule.py", "opcodes.py", "util.py"}
+DEFAULT_CACHE_FILE = REPO_ROOT / ".proof_cache.json"
+
+PASSED = "passed"
+FAILED = "failed"
+UNKNOWN = "unknown"
+
+# Messages printed by Rule when the solver cannot decide a check
+UNKNOWN_MESSAGES = ("Unable to prove rule.", "Unable to satisfy requirements.")
+OUT_OF_MEMORY_MESSAGES = ("MemoryError", "out of memory")
+# Reason of a failure caused by a signal, followed by the number of the signal
+KILLED_BY_SIGNAL = "killed by signal"
+# Environment variable telling Rule where to write the statistics of its checks
+STATISTICS_FILE_VARIABLE = "PROOF_STATISTICS_FILE"
+
+
+def find_proofs():
+    return sorted(
+        proof for proof in PROOF_DIR.glob("*.py")
+        if proof.name not in HELPER_MODULES
+    )
+
+
+def changed_proofs(revision):
+    """Returns the proofs that differ from the revision, or all of them if a helper module does."""
+    output = subprocess.run(
+        ["git", "diff", "--name-only", revision, "--", str(PROOF_DIR)],
+        cwd=REPO_ROOT,
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    ).stdout
+    changed = {Path(line).name for line in output.splitlines() if line.endswith(".py")}
+    proofs = find_proofs()
+    if changed & HELPER_MODULES:
+        return proofs
+    return [proof for proof in proofs if proof.name in changed]
+
+
+def local_imports(module):
+    """Returns the modules next to the given one that it imports, directly or through other modules."""
+    imported = set()
+    pending = [module]
+    while pending:
+        try:
+            tree = ast.parse(pending.pop().read_bytes())
+        except SyntaxError:
+            # Reported as a failure when the proof is run.
+            continue
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module is not None:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                candidate = module.parent / (name.split(".")[0] + ".py")
+                if candidate.is_file() and candidate not in imported:
+                    imported.add(candidate)
+                    pending.append(candidate)
+    imported.discard(module)
+    return imported
+
+
+def z3_version():
+    """Returns the version of z3 the proofs run with or None if z3 is not installed."""
+    result = subprocess.run(
+        [sys.executable, "-c", "import z3; print(z3.get_full_version())"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        universal_newlines=True,
+        check=False,
+    )
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def proof_key(proof, solver_version):
+    """Returns a hash of everything the result of the proof depends on."""
+    digest = hashlib.sha256(f"z3 {solver_version}\n".encode())
+    for module in [proof] + sorted(local_imports(proof)):
+        digest.update(f"{module.name} {hashlib.sha256(module.read_bytes()).hexdigest()}\n".encode())
+    return digest.hexdigest()
+
+
+class ProofCache:
+    """
+    Persistent record of the results of proofs, keyed by ``proof_key()``. Only passed and
+    failed proofs are recorded, since an unknown result depends on the limits of the run. Proofs
+    killed by a signal are not recorded either, since the signal may have come from outside,
+    e.g. from the OOM killer or from the user.
+    """
+
+    VERSION = 3
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.results = {}
+        self.modified = False
+
+        try:
+            with open(cache_file, 'r', encoding='utf8') as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION:
+                self.results = {key: tuple(result) for key, result in data["results"].items()}
+        except (OSError, ValueError, KeyError, AttributeError, TypeError):
+            # A missing or corrupted cache only means that all proofs are run again.
+            pass
+
+    def add(self, key, result):
+        status, _, reason, _, _ = result
+        if status != UNKNOWN and not (status == FAILED and reason.startswith(KILLED_BY_SIGNAL)):
+            self.results[key] = result
+            self.modified = True
+
+    def save(self):
+        if not self.modified:
+            return
+
+        temporary_file = f"{self.cache_file}.tmp"
+        with open(temporary_file, 'w', encoding='utf8') as f:
+            json.dump({"version": self.VERSION, "results": self.results}, f)
+        os.replace(temporary_file, self.cache_file)
+        self.modified = False
+
+
+def limit_memory(memory_limit):
+    def set_limit():
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    return set_limit
+
+
+def read_statistics(statistics_file):
+    """Returns the number of checks, the solver time, the conflicts and the peak memory in MiB of a proof."""
+    summary = {"checks": 0, "time": 0.0, "conflicts": 0, "memory": 0.0}
+    try:
+        with open(statistics_file, 'r', encoding='utf8') as f:
+            lines = f.readlines()
+    except OSError:
+        return summary
+
+    for line in lines:
+        try:
+            entry = json.loads(line)
+        except ValueError:
+            # The last line is incomplete if the proof was killed while writing it.
+            continue
+        if entry.get("check") == "rule":
+            summary["checks"] += 1
+        summary["time"] += entry.get("time", 0.0)
+        summary["conflicts"] += entry.get("conflicts", 0) + entry.get("sat conflicts", 0)
+        summary["memory"] = max(summary["memory"], entry.get("max memory", 0.0))
+    return summary
+
+
+def run_proof(proof, timeout, memory_limit):
+    """Returns
+
+    the status of the proof, its wall time in seconds, the reason it did not pass, its output
+    and the summary of its solver statistics.
+
+    """
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        statistics_file = os.path.join(temporary_dir, "statistics.jsonl")
+        environment = dict(os.environ, **{STATISTICS_FILE_VARIABLE: statistics_file})
+        status, elapsed, reason, output = prove(proof, timeout, memory_limit, environment)
+        return status, elapsed, reason, output, read_statistics(statistics_file)
+
+
+def prove(proof, timeout, memory_limit, environment):
+    start = time.perf_counter()
+    try:
+        # Proofs run in the worker processes of a ProcessPoolExecutor, which do not start threads,
+        # so using preexec_fn is safe here.
+        result = subprocess.run(
+            [sys.executable, str(proof)],
+            cwd=PROOF_DIR,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,
+            timeout=timeout,
+            preexec_fn=limit_memory(memory_limit) if memory_limit else None,
+            env=environment,
+            check=False,
+        )
+    except subprocess.TimeoutExpired as exception:
+        output = exception.output or ""
+        if isinstance(output, bytes):
+            output = output.decode("utf8", errors="replace")
+        return UNKNOWN, time.perf_counter() - start, f"timeout after {timeout} s", output
+    elapsed = time.perf_counter() - start
+
+    output = result.stdout
+    if result.returncode == 0:
+        return PASSED, elapsed, None, output
+    for message in UNKNOWN_MESSAGES:
+        if message in output:
+            return UNKNOWN, elapsed, message, output
+    if memory_limit and any(message in output for message in OUT_OF_MEMORY_MESSAGES):
+        return UNKNOWN, elapsed, "memory limit exceeded", output
+    if result.returncode < 0:
+        return FAILED, elapsed, f"{KILLED_BY_SIGNAL} {-result.returncode}", output
+    lines = output.strip().splitlines()
+    return FAILED, elapsed, lines[0] if lines else f"exit code {result.returncode}", output
+
+
+def run_proofs(proofs, jobs, timeout, memory_limit, cache):
+    """Returns
+
+    a dictionary with the result of ``run_proof()`` for every proof and the set of proofs whose
+    result was taken from the cache.
+
+    """
+    results = {}
+    keys = {}
+    if cache is not None:
+        solver_version = z3_version()
+        keys = {proof: proof_key(proof, solver_version) for proof in proofs}
+        results = {proof: cache.results[key] for proof, key in keys.items() if key in cache.results}
+    cached = set(results)
+    pending = [proof for proof in proofs if proof not in cached]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(run_proof, proof, timeout, memory_limit): proof for proof in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            proof = futures[future]
+            results[proof] = future.result()
+            if cache is not None:
+                cache.add(keys[proof], results[proof])
+            print(f"\r{done}/{len(pending)} proofs done ({len(cached)} cached)", end="", file=sys.stderr, flush=True)
+    if pending:
+        print(file=sys.stderr)
+    return results, cached
+
+
+def print_results(results, cached):
+    """Prints a table with the status, solve time, solver statistics and reason of failure per proof."""
+    rows = [("Proof", "Status", "Cached", "Time (s)", "Checks", "Solver time (s)", "Conflicts", "Memory (MiB)", "Reason")]
+    rows += [
+        (
+            proof.stem, status if status == PASSED else status.upper(), "yes" if proof in cached else "no",
+            f"{elapsed:.1f}", str(statistics["checks"]), f"{statistics['time']:.1f}", str(statistics["conflicts"]),
+            f"{statistics['memory']:.0f}", reason or ""
+        )
+        for proof, (status, elapsed, reason, _, statistics) in sorted(results.items(), key=lambda item: item[0].name)
+    ]
+    widths = [max(len(row[column]) for row in rows) for column in range(len(rows[0]))]
+    for row in rows:
+        print("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+
+def print_failures(results):
+    for proof, (status, _, _, output, _) in sorted(results.items(), key=lambda item: item[0].name):
+        if status != PASSED and output.strip():
+            print("")
+            print(f"Output of {proof.stem} ({status}):")
+            print(output.rstrip())
+
+
+def parse_command_line():
+    parser = ArgumentParser(description="Proves the correctness of the optimization rules in test/formal.")
+    parser.add_argument("proofs", nargs="*", metavar="PROOF", help="Proofs to run (default: all of them).")
+    parser.add_argument(
+        "--changed-since",
+        metavar="REV",
+        help="Only run the proofs that changed since the revision (all of them if a helper module changed).",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Number of proofs run in parallel.")
+    parser.add_argument("--timeout", type=float, default=1800, help="Seconds after which a proof is stopped.")
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        default=4096,
+        metavar="MIB",
+        help="Address space limit of every proof in MiB, 0 for no limit (default: 4096).",
+    )
+    parser.add_argument(
+        "--cache-file",
+        default=str(DEFAULT_CACHE_FILE),
+        help=f"File recording the results per proof (default: {DEFAULT_CACHE_FILE}).",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the cache file.")
+    return parser.parse_args()
+
+
+def main():
+    options = parse_command_line()
+    if options.proofs:
+        proofs = sorted(Path(proof).resolve() for proof in options.proofs)
+    elif options.changed_since is not None:
+        proofs = changed_proofs(options.changed_since)
+    else:
+        proofs = find_proofs()
+
+    if not proofs:
+        print("No proofs to run.")
+        return 0
+
+    print(f"Proving {len(proofs)} rule(s) with {options.jobs} job(s)...", file=sys.stderr)
+    cache = None if options.no_cache else ProofCache(options.cache_file)
+    results, cached = run_proofs(proofs, options.jobs, options.timeout, options.memory_limit * 1024 * 1024, cache)
+    if cache is not None:
+        cache.save()
+    print_results(results, cached)
+    print_failures(results)
+
+    counts = {status: 0 for status in (PASSED, FAILED, UNKNOWN)}
+    for status, _, _, _, _ in results.values():
+        counts[status] += 1
+    print("")
+    print(f"{counts[PASSED]} passed, {counts[FAILED]} failed, {counts[UNKNOWN]} unknown.")
+    return 0 if counts[PASSED] == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,46 +13,26 @@ import sys
 import os
 import traceback
 
-hasMultipleSources = False
-createdSources = []
+from isoltest_format import read_test_file
 
 
 def uncaught_exception_hook(exc_type, exc_value, exc_traceback):
-    # The script `scripts/ASTImportTest.sh` will interpret return code 3
+    # The script `test/stopAfterParseTests.sh` will interpret return code 3
     # as a critical error (because of the uncaught exception) and will
     # terminate further execution.
     print("Unhandled exception: %s", "".join(traceback.format_exception(exc_type, exc_value, exc_traceback)))
     sys.exit(3)
 
 
-def extractSourceName(line):
-    if line.find("/") > -1:
-        filePath = line[13: line.rindex("/")]
-        # fileName = line[line.rindex("/")+1: line.find(" ====")]
-        srcName = line[line.find(":")+2: line.find(" ====")]
-        return filePath, srcName
-    return False, line[line.find(":")+2 : line.find(" ====")]
-
-
-# expects the first line of lines to be "==== Source: sourceName ===="
-# writes the following source into a file named sourceName
-def writeSourceToFile(lines):
-    filePath, srcName = extractSourceName(lines[0])
-    # print("sourceName is ", srcName)
-    # print("filePath is", filePath)
-    if filePath != False:
-        os.system("mkdir -p " + filePath)
-    with open(srcName, mode='a+', encoding='utf8', newline='') as f:
-        createdSources.append(srcName)
-        for idx, line in enumerate(lines[1:]):
-            # write to file
-            if line[:12] != "==== Source:":
-                f.write(line)
-
-            # recursive call if there is another source
-            else:
-                writeSourceToFile(lines[1+idx:])
-                break
+# writes every source into a file named after its source name
+def writeSourcesToFiles(sources):
+    for srcName, content in sources.items():
+        filePath = os.path.dirname(srcName)
+        if filePath != "":
+            os.makedirs(filePath, exist_ok=True)
+        with open(srcName, mode='a+', encoding='utf8', newline='') as f:
+            f.write(content)
+    return list(sources)
 
 
 if __name__ == '__main__':
@@ -61,17 +41,10 @@ if __name__ == '__main__':
 
     try:
         # decide if file has multiple sources
-        with open(filePath, mode='r', encoding='utf8', newline='') as f:
-            lines = f.read().splitlines()
-        if len(lines) >= 1 and lines[0][:12] == "==== Source:":
-            hasMultipleSources = True
-            writeSourceToFile(lines)
-
-        if hasMultipleSources:
-            srcString = ""
-            for src in createdSources:
-                srcString += src + ' '
-            print(srcString)
+        sources = read_test_file(filePath).sources
+        if "" not in sources:
+            createdSources = writeSourcesToFiles(sources)
+            print(" ".join(createdSources) + " ")
             sys.exit(0)
         else:
             sys.exit(1)
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+
+"""
+Runs the fuzzer on inputs that made it fail (e.g. the crashes found by afl-fuzz) and groups
+them by the cause of the failure.
+
+Every input is passed to the fuzzer on its standard input, in parallel and with a timeout. The
+output of a failing run is reduced to a signature: the type of the exception and the location
+it was thrown at, the kind of sanitizer error and the functions on top of its stack trace, or
+the assertion that failed. Inputs with the same signature end up in the same bucket and the
+smallest input of each bucket is reported as its representative.
+
+Results are cached by the hash of the fuzzer binary and of the input, so running the script
+again after adding new crashes to a directory only runs the new ones. Timeouts are not cached,
+since they depend on the timeout of the run and on the load of the machine.
+
+Usage:
+
+  scripts/triage_crashes.py /tmp/fuzzer_reports/crashes/id*
+
+prints a JSON summary with one entry per bucket.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parents[1]
+DEFAULT_FUZZER = PROJECT_ROOT / "build/test/tools/solfuzzer"
+DEFAULT_CACHE_FILE = PROJECT_ROOT / ".triage_cache.json"
+
+# Number of stack frames of a sanitizer report that are part of the signature
+SIGNATURE_FRAMES = 3
+# Number of lines of the fuzzer output stored for every input
+OUTPUT_LINES = 20
+
+PASSED = "passed"
+FAILED = "failed"
+TIMEOUT = "timeout"
+
+TERMINATE_PATTERN = re.compile(r"terminate called after throwing an instance of '(.+)'")
+BOOST_LOCATION_PATTERN = re.compile(r"(\S+\.(?:cpp|h))\((\d+)\): Throw in function")
+DYNAMIC_EXCEPTION_TYPE_PATTERN = re.compile(r"^Dynamic exception type: (.+)$", re.MULTILINE)
+ASSERTION_PATTERN = re.compile(r"^\S+: (\S+\.(?:cpp|h)):(\d+): .*Assertion `.*' failed\.$", re.MULTILINE)
+SANITIZER_PATTERN = re.compile(r"ERROR: (\w+Sanitizer): ([\w-]+)")
+UBSAN_PATTERN = re.compile(r"^(\S+\.(?:cpp|h)):(\d+):\d+: runtime error: (.*)$", re.MULTILINE)
+FRAME_PATTERN = re.compile(r"^\s*#\d+ 0x[0-9a-f]+ in (.+?)(?: \S+:\d+(?::\d+)?| \(.*\))?$", re.MULTILINE)
+VOLATILE_PATTERN = re.compile(r"0x[0-9a-fA-F]+|\d+")
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def source_location(path, line):
+    """Returns the location relative to the repository, independent of where it was built."""
+    for top_dir in ("libsolidity", "libyul", "libevmasm", "liblangutil", "libsolutil", "libsmtutil", "libsolc", "test"):
+        marker = f"/{top_dir}/"
+        if marker in path:
+            path = top_dir + "/" + path.split(marker, 1)[1]
+            break
+    return f"{path}:{line}"
+
+
+def exception_type(text):
+    match = DYNAMIC_EXCEPTION_TYPE_PATTERN.search(text) or TERMINATE_PATTERN.search(text)
+    if match is None:
+        return None
+    type_name = match.group(1).strip()
+    wrapped = re.fullmatch(r"boost::(?:exception_detail::clone_impl<)?(?:wrapexcept|exception_detail::"
+                           r"error_info_injector)<(.+?)>+", type_name)
+    return wrapped.group(1) if wrapped else type_name
+
+
+def exception_signature(output):
+    type_name = exception_type(output)
+    if type_name is None:
+        return None
+
+    location = BOOST_LOCATION_PATTERN.search(output)
+    if location is None:
+        return type_name
+    return f"{type_name} at {source_location(location.group(1), location.group(2))}"
+
+
+def first_line_signature(output):
+    for line in output.splitlines():
+        if line.strip():
+            return VOLATILE_PATTERN.sub("N", line.strip())
+    return "no output"
+
+
+def crash_signature(output):
+    """Returns
+
+    a normalized description of why the fuzzer failed, which does not depend on memory
+    addresses, line numbers of the input or the directory the fuzzer was built in.
+
+    """
+    sanitizer = SANITIZER_PATTERN.search(output)
+    if sanitizer is not None:
+        frames = FRAME_PATTERN.findall(output[sanitizer.end():])[:SIGNATURE_FRAMES]
+        return " | ".join([f"{sanitizer.group(1)}: {sanitizer.group(2)}"] + frames)
+
+    ubsan = UBSAN_PATTERN.search(output)
+    if ubsan is not None:
+        message = VOLATILE_PATTERN.sub("N", ubsan.group(3))
+        return f"runtime error at {source_location(ubsan.group(1), ubsan.group(2))}: {message}"
+
+    assertion = ASSERTION_PATTERN.search(output)
+    if assertion is not None:
+        return f"assertion failed at {source_location(assertion.group(1), assertion.group(2))}"
+
+    signature = exception_signature(output)
+    if signature is not None:
+        return signature
+
+    return first_line_signature(output)
+
+
+def run_fuzzer(fuzzer_command, input_file, timeout):
+    """Returns
+
+    the status of the fuzzer run on the input, its signature and the first lines of the output.
+
+    """
+    with open(input_file, 'rb') as input_fh:
+        try:
+            result = subprocess.run(
+                fuzzer_command,
+                stdin=input_fh,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                timeout=timeout,
+                check=False,
+            )
+        except subprocess.TimeoutExpired as exception:
+            output = (exception.output or b"").decode('utf8', errors='replace')
+            return TIMEOUT, f"timeout after {timeout} s", output.splitlines()[:OUTPUT_LINES]
+
+    output = result.stdout.decode('utf8', errors='replace')
+    if result.returncode == 0:
+        return PASSED, None, []
+    signature = crash_signature(output)
+    if result.returncode < 0 and signature == "no output":
+        signature = f"killed by signal {-result.returncode}"
+    return FAILED, signature, output.splitlines()[:OUTPUT_LINES]
+
+
+class TriageCache:
+    """
+    Persistent record of the results of fuzzer runs, keyed by the hash of the input. The
+    results are only valid for the fuzzer binary and arguments they were recorded with. Only
+    passed and failed runs are recorded, since a timeout depends on the limits of the run.
+    """
+
+    VERSION = 2
+
+    def __init__(self, cache_file, fuzzer_key):
+        self.cache_file = cache_file
+        self.fuzzer_key = fuzzer_key
+        self.results = {}
+        self.modified = False
+
+        try:
+            with open(cache_file, 'r', encoding='utf8') as f:
+                data = json.load(f)
+            if data.get("version") == self.VERSION and data.get("fuzzer") == fuzzer_key:
+                self.results = data["results"]
+        except (OSError, ValueError, KeyError, AttributeError):
+            # A missing or corrupted cache only means that all inputs are run again.
+            pass
+
+    def add(self, input_hash, result):
+        if result[0] != TIMEOUT:
+            self.results[input_hash] = list(result)
+            self.modified = True
+
+    def save(self):
+        if not self.modified:
+            return
+
+        temporary_file = f"{self.cache_file}.tmp"
+        with open(temporary_file, 'w', encoding='utf8') as f:
+            json.dump({"version": self.VERSION, "fuzzer": self.fuzzer_key, "results": self.results}, f)
+        os.replace(temporary_file, self.cache_file)
+        self.modified = False
+
+
+def bucket_results(results):
+    """Returns
+
+    a list of buckets of the failed inputs with the same signature, the largest bucket first.
+    ``results`` maps an input file to its size and the result of ``run_fuzzer()``.
+
+    """
+    buckets = {}
+    for input_file, (size, (status, signature, output)) in results.items():
+        if status != PASSED:
+            buckets.setdefault((status, signature), []).append((size, input_file, output))
+
+    summary = []
+    for (status, signature), inputs in buckets.items():
+        inputs.sort()
+        size, representative, output = inputs[0]
+        summary.append({
+            "status": status,
+            "signature": signature,
+            "count": len(inputs),
+            "representative": representative,
+            "representative_size": size,
+            "output": output,
+            "inputs": sorted(input_file for _, input_file, _ in inputs),
+        })
+    return sorted(summary, key=lambda bucket: (-bucket["count"], bucket["signature"]))
+
+
+def triage(fuzzer_command, input_files, jobs, timeout, cache):
+    """Returns the results of the fuzzer runs on all inputs, using the cache where possible."""
+    hashes = {input_file: file_sha256(input_file) for input_file in input_files}
+    results = {}
+    pending = []
+    for input_file in input_files:
+        cached = cache.results.get(hashes[input_file]) if cache is not None else None
+        if cached is not None:
+            results[input_file] = (os.path.getsize(input_file), tuple(cached))
+        else:
+            pending.append(input_file)
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            (input_file, executor.submit(run_fuzzer, fuzzer_command, input_file, timeout))
+            for input_file in pending
+        ]
+        for done, (input_file, future) in enumerate(futures, 1):
+            result = future.result()
+            results[input_file] = (os.path.getsize(input_file), result)
+            if cache is not None:
+                cache.add(hashes[input_file], result)
+            print(f"\r{done}/{len(pending)} inputs run ({len(input_files) - len(pending)} cached)",
+                  end="", file=sys.stderr, flush=True)
+    if pending:
+        print(file=sys.stderr)
+    return results
+
+
+def parse_command_line():
+    parser = ArgumentParser(description="Groups the inputs that make the fuzzer fail by the cause of the failure.")
+    parser.add_argument("inputs", nargs="+", metavar="INPUT", help="Inputs to run the fuzzer on.")
+    parser.add_argument(
+        "--fuzzer",
+        default=str(DEFAULT_FUZZER),
+        help=f"Fuzzer binary that reads an input from its standard input (default: {DEFAULT_FUZZER}).",
+    )
+    parser.add_argument(
+        "--fuzzer-args",
+        default="--quiet",
+        help="Arguments passed to the fuzzer, e.g. \"--quiet --standard-json\" (default: --quiet).",
+    )
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="Number of fuzzer runs in parallel.")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds after which a fuzzer run is stopped.")
+    parser.add_argument(
+        "--cache-file",
+        default=str(DEFAULT_CACHE_FILE),
+        help=f"File recording the results per input (default: {DEFAULT_CACHE_FILE}).",
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the cache file.")
+    parser.add_argument("--output", help="Write the JSON summary to this file instead of the standard output.")
+    return parser.parse_args()
+
+
+def main():
+    options = parse_command_line()
+    fuzzer_args = shlex.split(options.fuzzer_args)
+    if not os.path.isfile(options.fuzzer):
+        print(f"Fuzzer not found: {options.fuzzer}", file=sys.stderr)
+        return 1
+
+    cache = None
+    if not options.no_cache:
+        fuzzer_key = f"{file_sha256(options.fuzzer)} {shlex.join(fuzzer_args)}"
+        cache = TriageCache(options.cache_file, fuzzer_key)
+
+    input_files = sorted(set(options.inputs))
+    results = triage([options.fuzzer, *fuzzer_args], input_files, options.jobs, options.timeout, cache)
+    if cache is not None:
+        cache.save()
+
+    buckets = bucket_results(results)
+    summary = {
+        "fuzzer": options.fuzzer,
+        "fuzzer_args": fuzzer_args,
+        "inputs": len(input_files),
+        "passed": sum(1 for _, (status, _, _) in results.values() if status == PASSED),
+        "buckets": buckets,
+    }
+    if options.output is not None:
+        with open(options.output, 'w', encoding='utf8') as f:
+            json.dump(summary, f, indent=4)
+    else:
+        json.dump(summary, sys.stdout, indent=4)
+        print()
+
+    for bucket in buckets:
+        print(f"{bucket['count']:6}  {bucket['representative']}  # {bucket['signature']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
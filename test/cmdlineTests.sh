@@ -646,16 +646,10 @@ SOLTMPDIR=$(mktemp -d)
 rm -r "$SOLTMPDIR"
 
 printTask "Testing AST import..."
-SOLTMPDIR=$(mktemp -d)
-(
-    cd "$SOLTMPDIR"
-    if ! "$REPO_ROOT/scripts/ASTImportTest.sh"
-    then
-        rm -r "$SOLTMPDIR"
-        fail
-    fi
-)
-rm -r "$SOLTMPDIR"
+if ! "$REPO_ROOT/scripts/ASTImportTest.py" --solc "$SOLC"
+then
+    fail
+fi
 
 printTask "Testing AST export with stop-after=parsing..."
 "$REPO_ROOT/test/stopAfterParseTests.sh"
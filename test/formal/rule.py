@@ -1,13 +1,23 @@
+import json
+import os
 import sys
+import time
 
 from z3 import sat, Solver, unknown, unsat
 
+# File the statistics of every solver check are appended to as JSON lines, if set
+STATISTICS_FILE_VARIABLE = 'PROOF_STATISTICS_FILE'
+
 class Rule:
 	def __init__(self):
 		self.requirements = []
 		self.constraints = []
 		self.solver = Solver()
 		self.setTimeout(60000)
+		# Requirements are asserted once, outside of the scopes of the checks.
+		self.assertedRequirements = 0
+		self.requirementsResult = None
+		self.statistics = []
 
 	def setTimeout(self, _t):
 		self.solver.set("timeout", _t)
@@ -19,19 +29,21 @@ class Rule:
 		self.requirements.append(_r)
 
 	def check(self, _nonopt, _opt):
-		self.solver.add(self.requirements)
-		result = self.solver.check()
+		if self.requirementsResult is None or self.assertedRequirements < len(self.requirements):
+			self.solver.add(self.requirements[self.assertedRequirements:])
+			self.assertedRequirements = len(self.requirements)
+			self.requirementsResult = self.solve('requirements')
 
-		if result == unknown:
+		if self.requirementsResult == unknown:
 			self.error('Unable to satisfy requirements.')
-		elif result == unsat:
+		elif self.requirementsResult == unsat:
 			self.error('Requirements are unsatisfiable.')
 
 		self.solver.push()
 		self.solver.add(self.constraints)
 		self.solver.add(_nonopt != _opt)
 
-		result = self.solver.check()
+		result = self.solve('rule')
 		if result == unknown:
 			self.error('Unable to prove rule.')
 		elif result == sat:
@@ -39,6 +51,25 @@ class Rule:
 			self.error('Rule is incorrect.\nModel: ' + str(m))
 		self.solver.pop()
 
+	def solve(self, _kind):
+		start = time.perf_counter()
+		result = self.solver.check()
+		elapsed = time.perf_counter() - start
+
+		statistics = self.solver.statistics()
+		entry = {key: statistics.get_key_value(key) for key in statistics.keys()}
+		# Z3 does not report the time of incremental checks.
+		entry.setdefault('time', elapsed)
+		entry['check'] = _kind
+		entry['result'] = str(result)
+		self.statistics.append(entry)
+
+		statisticsFile = os.environ.get(STATISTICS_FILE_VARIABLE)
+		if statisticsFile:
+			with open(statisticsFile, 'a', encoding='utf8') as f:
+				f.write(json.dumps(entry) + '\n')
+		return result
+
 	def error(self, msg):
 		print(msg)
 		sys.exit(1)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""
+Measures how long error_codes.py takes to decide whether error IDs found in the real libsolidity
+and libyul source trees are commented out, comparing the comment-span index against the previous
+per-match rfind() scans.
+
+Run from the root project dir:
+
+  python3 test/scripts/benchmark_error_codes.py
+"""
+
+import re
+import sys
+import timeit
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+# pragma pylint: disable=import-error,wrong-import-position
+from error_codes import SOURCE_FILE_PATTERN, find_comment_spans, find_files, in_comment, read_file
+# pragma pylint: enable=import-error,wrong-import-position
+
+
+def rfind_in_comment(source, pos):
+    """The original implementation, scanning back to the start of the file for every match."""
+    slash_slash_pos = source.rfind("//", 0, pos)
+    lf_pos = source.rfind("\n", 0, pos)
+    if slash_slash_pos > lf_pos:
+        return True
+    slash_star_pos = source.rfind("/*", 0, pos)
+    star_slash_pos = source.rfind("*/", 0, pos)
+    return slash_star_pos > star_slash_pos
+
+
+def filter_with_rfind(matches):
+    return [
+        (file_name, pos)
+        for file_name, source, positions in matches
+        for pos in positions
+        if not rfind_in_comment(source, pos)
+    ]
+
+
+def filter_with_comment_spans(matches):
+    result = []
+    for file_name, source, positions in matches:
+        comment_spans = find_comment_spans(source)
+        result += [(file_name, pos) for pos in positions if not in_comment(comment_spans, pos)]
+    return result
+
+
+def benchmark(title, matches):
+    if filter_with_rfind(matches) != filter_with_comment_spans(matches):
+        sys.exit(f"{title}: results differ between the rfind() scans and the comment-span index.")
+
+    repeat = 5
+    rfind_time = min(timeit.repeat(lambda: filter_with_rfind(matches), number=1, repeat=repeat))
+    spans_time = min(timeit.repeat(lambda: filter_with_comment_spans(matches), number=1, repeat=repeat))
+    print(title)
+    print(f"    rfind() scans:      {rfind_time * 1000:8.1f} ms")
+    print(f"    comment-span index: {spans_time * 1000:8.1f} ms")
+    print(f"    speedup:            {rfind_time / spans_time:8.1f}x")
+
+
+def synthetic_source(line_count):
+    """A large file without block comments, where every rfind("/*") scans back to the start."""
+    return "".join(
+        f'    m_errorReporter.typeError({1000 + k % 9000}_error, _location, "Message {k}."); // Note {k}\n'
+        for k in range(line_count)
+    )
+
+
+def main():
+    file_names = find_files(str(PROJECT_ROOT), ["libsolidity", "libyul"], [".h", ".cpp"])
+    sources = [(file_name, read_file(file_name)) for file_name in file_names]
+    matches = [
+        (file_name, source, [m.start() for m in re.finditer(SOURCE_FILE_PATTERN, source)])
+        for file_name, source in sources
+    ]
+    matches = [(file_name, source, positions) for file_name, source, positions in matches if positions]
+    print(
+        f"{len(sources)} files, {sum(len(source) for _, source in sources)} bytes, "
+        f"{sum(len(positions) for _, _, positions in matches)} IDs in {len(matches)} files"
+    )
+
+    benchmark("libsolidity and libyul", matches)
+
+    source = synthetic_source(5000)
+    positions = [m.start() for m in re.finditer(SOURCE_FILE_PATTERN, source)]
+    benchmark(f"synthetic file ({len(source)} bytes, {len(positions)} IDs)", [("synthetic.cpp", source, positions)])
+
+
+if __name__ == "__main__":
+    main()
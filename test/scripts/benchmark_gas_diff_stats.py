@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+"""
+Compares collect_statistics() from gas_diff_stats.py against the previous parsec-based parser
+on large synthetic diffs, checking that both return identical tuples and reporting the speedup.
+
+Dependencies: Parsec (https://pypi.org/project/parsec/), only for the reference parser.
+
+Run from the root project dir:
+
+  python3 test/scripts/benchmark_gas_diff_stats.py
+"""
+
+import random
+import sys
+import timeit
+from pathlib import Path
+
+from parsec import generate, ParseError, regex, string
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
+# pragma pylint: disable=import-error,wrong-import-position
+from gas_diff_stats import Diff, Kind, collect_statistics
+# pragma pylint: enable=import-error,wrong-import-position
+
+
+minus = string("-").result(Diff.Minus)
+plus = string("+").result(Diff.Plus)
+
+space = string(" ")
+comment = string("//")
+colon = string(":")
+
+gas_ir_optimized = string("gas irOptimized").result(Kind.IrOptimized)
+gas_legacy_optimized = string("gas legacyOptimized").result(Kind.LegacyOptimized)
+gas_legacy = string("gas legacy").result(Kind.Legacy)
+
+@generate
+def diff_string():
+    diff_kind = yield minus | plus
+    yield comment
+    yield space
+    codegen_kind = yield gas_ir_optimized ^ gas_legacy_optimized ^ gas_legacy
+    yield colon
+    yield space
+    val = yield regex(r"([0-9]+)").parsecmap(int)
+    return (diff_kind, codegen_kind, val)
+
+def parsec_collect_statistics(lines):
+    """The original implementation, parsing every line with parsec and scanning the result six times."""
+    def try_parse(line):
+        try:
+            return diff_string.parse(line)
+        except ParseError:
+            pass
+        return None
+
+    out = [parsed for line in lines if (parsed := try_parse(line)) is not None]
+    diff_kinds = [Diff.Minus, Diff.Plus]
+    codegen_kinds = [Kind.IrOptimized, Kind.LegacyOptimized, Kind.Legacy]
+    return tuple(
+        sum(
+            val
+            for (diff_kind, codegen_kind, val) in out
+            if diff_kind == _diff_kind and codegen_kind == _codegen_kind
+        )
+        for _diff_kind in diff_kinds
+        for _codegen_kind in codegen_kinds
+    )
+
+def synthetic_diff(rng, line_count):
+    """A diff of a semantic test with a mix of gas changes, call expectations and unrelated lines."""
+    templates = [
+        lambda: f"{rng.choice('-+')}// gas irOptimized: {rng.randrange(1, 10**7)}",
+        lambda: f"{rng.choice('-+')}// gas legacy: {rng.randrange(1, 10**7)}",
+        lambda: f"{rng.choice('-+')}// gas legacyOptimized: {rng.randrange(1, 10**7)}",
+        lambda: f"{rng.choice('-+')}// gas irOptimized code: {rng.randrange(1, 10**7)}",
+        lambda: f"{rng.choice('-+')}// f(uint256): {rng.randrange(100)} -> {rng.randrange(100)}",
+        lambda: f"@@ -{rng.randrange(1, 100)} +{rng.randrange(1, 100)} @@",
+        lambda: f"+    uint x = {rng.randrange(100)};",
+        lambda: "--- a/test/libsolidity/semanticTests/array/copying.sol",
+    ]
+    return ["diff --git a/test.sol b/test.sol"] + [rng.choice(templates)() for _ in range(line_count)]
+
+def main():
+    rng = random.Random(42)
+    diffs = [synthetic_diff(rng, rng.randrange(10, 2000)) for _ in range(200)]
+    print(f"{len(diffs)} diffs, {sum(len(lines) for lines in diffs)} lines")
+
+    for lines in diffs:
+        expected = parsec_collect_statistics(lines)
+        if collect_statistics(lines) != expected:
+            sys.exit(f"Results differ: {collect_statistics(lines)} != {expected}")
+    print("All tuples are identical.")
+
+    repeat = 3
+    parsec_time = min(timeit.repeat(lambda: [parsec_collect_statistics(lines) for lines in diffs], number=1, repeat=repeat))
+    regex_time = min(timeit.repeat(lambda: [collect_statistics(lines) for lines in diffs], number=1, repeat=repeat))
+    print(f"parsec:  {parsec_time * 1000:8.1f} ms")
+    print(f"regex:   {regex_time * 1000:8.1f} ms")
+    print(f"speedup: {parsec_time / regex_time:8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+
+import sys
+import unittest
+
+from textwrap import dedent
+
+from unittest_helpers import LIBSOLIDITY_TEST_DIR, make_temp_dir
+
+# NOTE: This test file file only works with scripts/ added to PYTHONPATH so pylint can't find the imports
+# pragma pylint: disable=import-error
+from ASTImportTest import FAILED, PASSED, UNCOMPILABLE, canonical_hash, first_difference, load_sources
+from ASTImportTest import test_import_export_equivalence as round_trip
+from isoltest_format import TestFileCache
+# pragma pylint: enable=import-error
+
+# Stands in for solc. The AST of a source holds its content. Sources containing "error" do not
+# compile and sources containing "lossy" lose the name of their first node on reimport. The export
+# has to request bytecode, so that errors in code generation are reported.
+FAKE_SOLC = dedent("""\
+    import json
+    import sys
+
+    if sys.argv[1] == "--standard-json":
+        standard_json_input = json.load(sys.stdin)
+        assert "evm.bytecode.object" in standard_json_input["settings"]["outputSelection"]["*"]["*"]
+        sources = standard_json_input["sources"]
+        errors = [{"severity": "error"} for source in sources.values() if "error" in source["content"]]
+        print(json.dumps({
+            "errors": errors,
+            "sources": {
+                name: {"id": index, "ast": {"nodeType": "SourceUnit", "nodes": [{"name": source["content"]}]}}
+                for index, (name, source) in enumerate(sources.items())
+            },
+        }))
+    else:
+        assert sys.argv[1:4] == ["--import-ast", "--combined-json", "ast"]
+        with open(sys.argv[4], encoding="utf8") as f:
+            sources = json.load(f)["sources"]
+        for source in sources.values():
+            if "lossy" in source["ast"]["nodes"][0]["name"]:
+                source["ast"]["nodes"][0]["name"] = ""
+        print(json.dumps({"sources": {name: {"AST": source["ast"]} for name, source in sources.items()}}))
+""")
+
+
+class TestFirstDifference(unittest.TestCase):
+    def test_paths(self):
+        expected = {"nodes": [{"name": "a", "id": 1}, {"name": "b"}], "src": "0:1:0"}
+
+        self.assertEqual(
+            first_difference(expected, {**expected, "nodes": [{"name": "a", "id": 1}, {"name": "c"}]}),
+            '/nodes/1/name: expected "b", obtained "c"'
+        )
+        self.assertEqual(
+            first_difference(expected, {"nodes": expected["nodes"]}),
+            "/src: missing in the reimported AST"
+        )
+        self.assertEqual(
+            first_difference(expected, {**expected, "extra": None}),
+            "/extra: only in the reimported AST"
+        )
+
+    def test_lists_of_different_length_are_reported_as_a_whole(self):
+        self.assertEqual(first_difference({"a": [1, 2]}, {"a": [1]}), "/a: expected [1, 2], obtained [1]")
+
+    def test_different_types_at_root(self):
+        self.assertEqual(first_difference({}, None), "/: expected {}, obtained null")
+
+
+class TestCanonicalHash(unittest.TestCase):
+    def test_key_order_does_not_matter(self):
+        self.assertEqual(
+            canonical_hash({"a": 1, "b": {"c": [1, 2]}}),
+            canonical_hash({"b": {"c": [1, 2]}, "a": 1})
+        )
+
+    def test_values_matter(self):
+        self.assertNotEqual(canonical_hash({"a": [1, 2]}), canonical_hash({"a": [2, 1]}))
+        self.assertNotEqual(canonical_hash({"a": 1}), canonical_hash({"a": "1"}))
+
+
+class TestLoadSources(unittest.TestCase):
+    def setUp(self):
+        self.cache = TestFileCache(":memory:")
+        self.addCleanup(self.cache.close)
+
+    def test_source_without_header_is_named_after_the_test(self):
+        sources = load_sources(self.cache, LIBSOLIDITY_TEST_DIR / "syntaxTests/constants/abi_encoding_constant.sol")
+        self.assertEqual(list(sources), ["test/libsolidity/syntaxTests/constants/abi_encoding_constant.sol"])
+
+    def test_multiple_sources(self):
+        sources = load_sources(self.cache, LIBSOLIDITY_TEST_DIR / "syntaxTests/constants/redefinition_cross_file.sol")
+        self.assertEqual(sources, {
+            "a": 'import "b";\nuint constant c = 7;\n',
+            "b": 'import "a";\nuint constant c = 7;\n',
+        })
+
+    def test_invalid_utf8(self):
+        self.assertIsNone(load_sources(self.cache, LIBSOLIDITY_TEST_DIR / "syntaxTests/string/invalid_utf8_sequence.sol"))
+
+
+class TestRoundTrip(unittest.TestCase):
+    def setUp(self):
+        self.solc = make_temp_dir(self) / "solc"
+        self.solc.write_text(f"#!{sys.executable}\n" + FAKE_SOLC, encoding="utf8")
+        self.solc.chmod(0o755)
+
+    def round_trip(self, sources):
+        return round_trip(str(self.solc), "test.sol", sources)
+
+    def test_identical_asts_pass(self):
+        self.assertEqual(self.round_trip({"a": "contract A {}", "b": "contract B {}"}), (PASSED, None, 2))
+
+    def test_only_differing_sources_are_reported(self):
+        status, message, source_count = self.round_trip({"a": "contract A {}", "b": "lossy"})
+
+        self.assertEqual((status, source_count), (FAILED, 2))
+        self.assertEqual(
+            message,
+            'ERROR: JSONS differ for test.sol:\n  b/nodes/0/name: expected "lossy", obtained ""'
+        )
+
+    def test_uncompilable_sources(self):
+        self.assertEqual(self.round_trip({"a": "contract A {}", "b": "error"}), (UNCOMPILABLE, None, 2))
+        self.assertEqual(self.round_trip(None), (UNCOMPILABLE, None, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
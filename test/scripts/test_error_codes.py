@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+
+import json
+import os
+import re
+import unittest
+from pathlib import Path
+from textwrap import dedent
+
+from unittest_helpers import LIBSOLIDITY_TEST_DIR, make_temp_dir
+
+# NOTE: This test file file only works with scripts/ added to PYTHONPATH so pylint can't find the imports
+# pragma pylint: disable=import-error
+from error_codes import SOURCE_FILE_PATTERN, ScanCache, find_comment_spans, find_ids_in_source_files
+from error_codes import SOURCE_SUB_DIRS, TEST_SUB_DIRS, TEST_EXTENSIONS, IdWatcher, find_files
+from error_codes import find_ids_in_cmdline_test_err, find_ids_in_test_file, find_ids_in_test_files, in_comment
+# pragma pylint: enable=import-error
+
+
+def ids_outside_comments(source):
+    comment_spans = find_comment_spans(source)
+    return [
+        m.group(0)[:-len("_error")]
+        for m in re.finditer(SOURCE_FILE_PATTERN, source)
+        if not in_comment(comment_spans, m.start())
+    ]
+
+
+class TestCommentSpans(unittest.TestCase):
+    def test_line_and_block_comments(self):
+        source = dedent("""
+            /* 1111_error */
+            m_errorReporter.typeError(2222_error, _location, "Message"); // 3333_error
+            /*
+             * 4444_error
+             */
+            m_errorReporter.syntaxError(5555_error, _location, "Message");
+        """)
+        self.assertEqual(ids_outside_comments(source), ["2222", "5555"])
+
+    def test_string_literals(self):
+        source = dedent("""
+            string s = "// 1111_error";
+            m_errorReporter.typeError(2222_error, _location, "/* unterminated");
+            char c = '"';
+            m_errorReporter.typeError(3333_error, _location, "\\"4444_error\\"");
+            auto r = R"abc(5555_error)" )abc";
+            m_errorReporter.typeError(6666_error, _location, "Message");
+        """)
+        self.assertEqual(ids_outside_comments(source), ["2222", "3333", "6666"])
+
+    def test_digit_separators_are_not_character_literals(self):
+        source = "size_t x = 1'000'000;\nm_errorReporter.typeError(1234_error, _location, \"Message\");\n"
+        self.assertEqual(ids_outside_comments(source), ["1234"])
+
+    def test_unterminated_block_comment(self):
+        source = "m_errorReporter.typeError(1111_error, _location, \"\");\n/* 2222_error"
+        self.assertEqual(ids_outside_comments(source), ["1111"])
+
+    def test_position_boundaries(self):
+        source = "a // b\nc"
+        comment_spans = find_comment_spans(source)
+        self.assertEqual(
+            [in_comment(comment_spans, pos) for pos in range(len(source))],
+            [False, False, True, True, True, True, False, False]
+        )
+
+
+class TestScanCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = make_temp_dir(self)
+        self.cache_file = str(self.tmp_dir / 'cache.json')
+        self.source_file = str(self.tmp_dir / 'Checker.cpp')
+        self.test_file = str(self.tmp_dir / 'test.sol')
+
+        Path(self.source_file).write_text("typeError(1234_error);\n// 4321_error\ntypeError(5678_error);\n", encoding='utf-8')
+        Path(self.test_file).write_text("contract C {}\n// ----\n// TypeError 1234: (0-1): Message.\n", encoding='utf-8')
+
+    def test_unchanged_files_are_served_from_cache(self):
+        self.assertEqual(find_ids_in_source_files([self.source_file], ScanCache(self.cache_file)), {
+            "1234": [self.source_file],
+            "5678": [self.source_file],
+        })
+        self.assertEqual(find_ids_in_test_files([self.test_file], ScanCache(self.cache_file)), {"1234"})
+
+        # Replace the cached ids to detect whether the files are read again.
+        cache = ScanCache(self.cache_file)
+        cache.entries["source"][self.source_file]["ids"] = ["1111"]
+        cache.entries["test"][self.test_file]["ids"] = ["2222"]
+        cache.modified = True
+        cache.save()
+
+        self.assertEqual(find_ids_in_source_files([self.source_file], ScanCache(self.cache_file)), {
+            "1111": [self.source_file],
+        })
+        self.assertEqual(find_ids_in_test_files([self.test_file], ScanCache(self.cache_file)), {"2222"})
+
+    def test_modified_files_are_rescanned(self):
+        find_ids_in_source_files([self.source_file], ScanCache(self.cache_file))
+
+        Path(self.source_file).write_text("typeError(9876_error);\n", encoding='utf-8')
+        self.assertEqual(find_ids_in_source_files([self.source_file], ScanCache(self.cache_file)), {
+            "9876": [self.source_file],
+        })
+
+    def test_touched_files_with_same_content_are_not_reparsed(self):
+        find_ids_in_source_files([self.source_file], ScanCache(self.cache_file))
+
+        cache = ScanCache(self.cache_file)
+        cache.entries["source"][self.source_file]["ids"] = ["1111"]
+        cache.entries["source"][self.source_file]["mtime"] -= 1
+        cache.modified = True
+        cache.save()
+
+        self.assertEqual(find_ids_in_source_files([self.source_file], ScanCache(self.cache_file)), {
+            "1111": [self.source_file],
+        })
+
+    def test_deleted_files_are_dropped(self):
+        find_ids_in_source_files([self.source_file], ScanCache(self.cache_file))
+        os.remove(self.source_file)
+
+        self.assertEqual(find_ids_in_source_files([], ScanCache(self.cache_file)), {})
+        self.assertEqual(ScanCache(self.cache_file).entries["source"], {})
+
+    def test_cache_of_older_version_is_discarded(self):
+        stat = os.stat(self.test_file)
+        Path(self.cache_file).write_text(json.dumps({"version": 1, "entries": {"source": {}, "test": {
+            self.test_file: {"mtime": stat.st_mtime_ns, "size": stat.st_size, "hash": "", "ids": ["9999"]},
+        }}}), encoding='utf-8')
+
+        self.assertEqual(ScanCache(self.cache_file).entries["test"], {})
+        self.assertEqual(find_ids_in_test_files([self.test_file], ScanCache(self.cache_file)), {"1234"})
+
+    def test_corrupted_cache_is_ignored(self):
+        Path(self.cache_file).write_text("{not json", encoding='utf-8')
+        self.assertEqual(find_ids_in_test_files([self.test_file], ScanCache(self.cache_file)), {"1234"})
+
+
+class TestIdWatcher(unittest.TestCase):
+    def setUp(self):
+        self.top_dir = make_temp_dir(self)
+        for sub_dir in SOURCE_SUB_DIRS + TEST_SUB_DIRS:
+            (self.top_dir / sub_dir).mkdir(parents=True)
+
+        self.write('libsolidity/A.cpp', "typeError(1234_error);\n")
+        self.write('libsolidity/B.cpp', "typeError(5678_error);\n")
+        self.write('test/libsolidity/syntaxTests/a.sol', "// ----\n// TypeError 1234: Message.\n")
+        self.write('test/libsolidity/syntaxTests/b.sol', "// ----\n// TypeError 5678: Message.\n")
+
+    def write(self, relative_path, content):
+        file_path = self.top_dir / relative_path
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        file_path.write_text(content, encoding='utf-8')
+        # Make sure the change is visible even on file systems with coarse timestamps.
+        stat = file_path.stat()
+        os.utime(file_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+    def test_duplicates_are_reported_and_fixed(self):
+        watcher = IdWatcher(str(self.top_dir))
+        self.assertEqual(watcher.problems, {})
+        self.assertEqual(watcher.poll(), ([], [], []))
+
+        self.write('libsolidity/B.cpp', "typeError(5678_error);\ntypeError(1234_error);\n")
+        changed_file_names, new_problems, fixed_problems = watcher.poll()
+        self.assertEqual(changed_file_names, [str(self.top_dir / 'libsolidity/B.cpp')])
+        self.assertEqual(new_problems, ["ID 1234 appears 2 times: libsolidity/A.cpp, libsolidity/B.cpp"])
+        self.assertEqual(fixed_problems, [])
+
+        os.remove(self.top_dir / 'libsolidity/A.cpp')
+        changed_file_names, new_problems, fixed_problems = watcher.poll()
+        self.assertEqual(changed_file_names, [str(self.top_dir / 'libsolidity/A.cpp')])
+        self.assertEqual(new_problems, [])
+        self.assertEqual(fixed_problems, ["ID 1234 appears 2 times: libsolidity/A.cpp, libsolidity/B.cpp"])
+        self.assertEqual(watcher.problems, {})
+
+    def test_coverage_follows_test_changes(self):
+        watcher = IdWatcher(str(self.top_dir))
+
+        os.remove(self.top_dir / 'test/libsolidity/syntaxTests/b.sol')
+        self.assertEqual(watcher.poll()[1], ["ID 5678 is not covered by tests"])
+
+        self.write('test/libsolidity/syntaxTests/c.sol', "// ----\n// TypeError 5678: Message.\n")
+        self.assertEqual(watcher.poll()[2], ["ID 5678 is not covered by tests"])
+
+
+class TestTestFileScanning(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = make_temp_dir(self)
+
+    def write(self, file_name, content):
+        file_path = self.tmp_dir / file_name
+        file_path.write_bytes(content)
+        return str(file_path)
+
+    def test_only_expectations_are_considered(self):
+        file_name = self.write('test.sol', dedent("""
+            // TypeError 1111: This is not an expectation.
+            contract C {}
+            // ====
+            // compileViaYul: true
+            // ----
+            // TypeError 2222: (0-1): Message.
+            // Warning 3333: (0-1): Message.
+            // DeclarationError 4444: Message.
+            // Info 5555: Message.
+            // TypeError 666: Too short.
+        """).encode())
+        self.assertEqual(find_ids_in_test_file(file_name), {"2222", "3333", "4444", "5555"})
+
+    def test_crlf_and_invalid_utf8(self):
+        file_name = self.write('invalid_utf8_sequence.sol', b"\xff\xfe\r\n// ----\r\n// ParserError 1234: \xff\r\n")
+        self.assertEqual(find_ids_in_test_file(file_name), {"1234"})
+
+    def test_empty_files(self):
+        self.assertEqual(find_ids_in_test_file(self.write('empty.sol', b"")), set())
+        self.assertEqual(find_ids_in_cmdline_test_err(self.write('err', b"")), set())
+
+    def test_cmdline_test_err(self):
+        file_name = self.write('err', b"Warning (1878): SPDX license identifier not provided.\nError (123): x\n")
+        self.assertEqual(find_ids_in_cmdline_test_err(file_name), {"1878"})
+
+    def test_cached_scanning_matches_uncached_on_syntax_tests(self):
+        file_names = find_files(str(LIBSOLIDITY_TEST_DIR), ["syntaxTests"], TEST_EXTENSIONS)
+        expected_ids = find_ids_in_test_files(file_names)
+
+        self.assertGreater(len(expected_ids), 0)
+        cache_file = str(self.tmp_dir / 'cache.json')
+        self.assertEqual(find_ids_in_test_files(file_names, ScanCache(cache_file)), expected_ids)
+        self.assertEqual(find_ids_in_test_files(file_names, ScanCache(cache_file)), expected_ids)
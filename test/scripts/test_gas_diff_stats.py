@@ -0,0 +1,169 @@
+#!/usr/bin/env python
+
+import subprocess
+import sys
+import unittest
+
+from pathlib import Path
+from textwrap import dedent
+
+# NOTE: This test file file only works with scripts/ added to PYTHONPATH so pylint can't find the imports
+# pragma pylint: disable=import-error
+from gas_diff_stats import (
+    INFINITE, aggregate_metrics, budget_violations, call_gas_changes, parse_call_gas, parse_gas_test_expectations,
+    split_git_diff, stat, summary_row
+)
+# pragma pylint: enable=import-error
+
+REPO_ROOT = Path(__file__).parents[2]
+
+MULTI_FILE_DIFF = dedent("""\
+    diff --git a/test/libsolidity/semanticTests/a.sol b/test/libsolidity/semanticTests/a.sol
+    index 1111111..2222222 100644
+    --- a/test/libsolidity/semanticTests/a.sol
+    +++ b/test/libsolidity/semanticTests/a.sol
+    @@ -10 +10 @@ contract C {
+    -// gas legacy: 100
+    +// gas legacy: 90
+    diff --git a/test/libsolidity/semanticTests/dir/b c.sol b/test/libsolidity/semanticTests/dir/b c.sol
+    index 3333333..4444444 100644
+    --- a/test/libsolidity/semanticTests/dir/b c.sol
+    +++ b/test/libsolidity/semanticTests/dir/b c.sol
+    @@ -3 +3 @@ contract D {
+    -// gas irOptimized: 200
+    +// gas irOptimized: 210
+""")
+
+SEMANTIC_TEST = dedent("""\
+    contract C {
+        function f(uint x) public returns (uint) { return x; }
+    }
+    // ----
+    // f(uint256): 1 -> 1
+    // gas irOptimized: 100
+    // gas legacy: 200
+    // gas legacyOptimized: 150
+    // f(uint256): 1 -> 1
+    // ~ emit E()
+    // gas legacy: 300
+    // g() -> FAILURE
+    // gas ir: 50
+    // gas irOptimized code: 4000
+    // gas legacy: 400
+""")
+
+
+class TestSplitGitDiff(unittest.TestCase):
+    def test_multiple_files(self):
+        sections = list(split_git_diff(line + "\n" for line in MULTI_FILE_DIFF.splitlines()))
+
+        self.assertEqual(
+            [fname for fname, _ in sections],
+            ["test/libsolidity/semanticTests/a.sol", "test/libsolidity/semanticTests/dir/b c.sol"]
+        )
+        self.assertFalse(any(line.endswith("\n") for _, lines in sections for line in lines))
+        self.assertEqual(sections[0][1][-2:], ["-// gas legacy: 100", "+// gas legacy: 90"])
+        self.assertEqual(sections[1][1][-2:], ["-// gas irOptimized: 200", "+// gas irOptimized: 210"])
+        self.assertEqual(len(sections[0][1]) + len(sections[1][1]), len(MULTI_FILE_DIFF.splitlines()))
+
+    def test_empty_diff(self):
+        self.assertEqual(list(split_git_diff([])), [])
+
+
+class TestParseCallGas(unittest.TestCase):
+    def test_repeated_calls_are_numbered(self):
+        calls = parse_call_gas(SEMANTIC_TEST)
+
+        self.assertEqual(calls[("f(uint256): 1", 0)], {"irOptimized": 100, "legacy": 200, "legacyOptimized": 150})
+        # Events between a call and its gas expectations do not start a new call.
+        self.assertEqual(calls[("f(uint256): 1", 1)], {"legacy": 300})
+
+    def test_other_gas_kinds_are_ignored(self):
+        # "gas ir" and "gas irOptimized code" are neither compared nor mistaken for calls.
+        self.assertEqual(parse_call_gas(SEMANTIC_TEST)[("g()", 0)], {"legacy": 400})
+        self.assertEqual(len(parse_call_gas(SEMANTIC_TEST)), 3)
+
+    def test_source_is_not_parsed(self):
+        self.assertEqual(parse_call_gas("// gas legacy: 100\ncontract C {}\n// ----\n"), {})
+
+    def test_changes_per_call_and_kind(self):
+        new_content = SEMANTIC_TEST.replace("// gas legacy: 300", "// gas legacy: 330").replace(
+            "// gas irOptimized: 100", "// gas irOptimized: 90"
+        )
+        self.assertEqual(list(call_gas_changes("a.sol", SEMANTIC_TEST, new_content)), [
+            ("a.sol", "f(uint256): 1", "irOptimized", 100, 90),
+            ("a.sol", "f(uint256): 1", "legacy", 300, 330),
+        ])
+        self.assertEqual(list(call_gas_changes("a.sol", SEMANTIC_TEST, SEMANTIC_TEST)), [])
+
+
+class TestGasTestExpectations(unittest.TestCase):
+    def test_infinite_estimates(self):
+        content = dedent("""\
+            contract C {}
+            // ====
+            // optimize: true
+            // ----
+            // creation:
+            //   codeDepositCost: 1243000
+            //   executionCost: infinite
+            // external:
+            //   a(): 2430
+        """)
+        self.assertEqual(parse_gas_test_expectations(content), {
+            ("creation", "codeDepositCost"): 1243000,
+            ("creation", "executionCost"): INFINITE,
+            ("external", "a()"): 2430,
+        })
+
+    def test_infinite_estimates_are_counted_but_not_summed(self):
+        changes = [(100, 150), (200, INFINITE), (INFINITE, 300)]
+        self.assertEqual(summary_row("gasTests", changes), ["gasTests", 3, 100, 150, "50.0", 1, 1])
+
+class TestAggregateMetrics(unittest.TestCase):
+    def test_zero_gas_has_no_ratio(self):
+        self.assertEqual(stat(0, 100), 0)
+        metrics = aggregate_metrics([(0, 100), (100, 0), (100, 110)], 1.0)
+        self.assertEqual((metrics["files"], metrics["skipped"]), (1, 2))
+        self.assertAlmostEqual(metrics["geomean"], 10.0)
+
+    def test_only_zero_gas_passes_every_budget(self):
+        metrics = aggregate_metrics([(0, 100), (100, 0)], 1.0)
+        self.assertEqual(metrics, {"files": 0, "skipped": 2})
+        self.assertEqual(budget_violations({"legacy": metrics}, {"geomean": 0.0, "above-threshold": 0}), [])
+
+    def test_change_at_threshold_is_not_above_it(self):
+        self.assertEqual(aggregate_metrics([(100, 150), (100, 151)], 50.0)["above-threshold"], 1)
+
+
+class TestBudgetViolations(unittest.TestCase):
+    def test_budget_exactly_at_limit(self):
+        metrics_per_codegen = {"irOptimized": aggregate_metrics([(100, 150)], 1.0)}
+
+        self.assertEqual(budget_violations(metrics_per_codegen, {"geomean": 50.0, "p99": 50.0}), [])
+        self.assertEqual(
+            budget_violations(metrics_per_codegen, {"geomean": 49.9}),
+            ["irOptimized: geomean is 50, the budget is 49.9"]
+        )
+
+
+class TestBudgetGate(unittest.TestCase):
+    def test_unknown_base_revision_fails(self):
+        result = subprocess.run(
+            [
+                sys.executable, str(REPO_ROOT / "scripts/gas_diff_stats.py"),
+                "--base", "refs/heads/no-such-revision", "--budget", "geomean=100"
+            ],
+            cwd=REPO_ROOT,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            check=False
+        )
+        self.assertEqual(result.returncode, 1)
+        self.assertIn("Error in the git diff", result.stderr)
+        self.assertNotIn("No differences found.", result.stdout)
+
+
+if __name__ == '__main__':
+    unittest.main()
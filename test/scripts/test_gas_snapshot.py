@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+import os
+import subprocess
+import unittest
+
+from unittest_helpers import make_temp_dir
+
+# NOTE: This test file file only works with scripts/ added to PYTHONPATH so pylint can't find the imports
+# pragma pylint: disable=import-error
+from gas_snapshot import compare_snapshots, find_snapshot, gas_history, open_database, take_snapshot
+# pragma pylint: enable=import-error
+
+TEST_FILE = "test/libsolidity/semanticTests/a.sol"
+OTHER_TEST_FILE = "test/libsolidity/semanticTests/dir/b.sol"
+
+OLD_CONTENT = """contract C {}
+// ----
+// f() -> 1
+// gas irOptimized: 100
+// gas legacy: 200
+// f() -> 1
+// gas legacy: 300
+"""
+NEW_CONTENT = OLD_CONTENT.replace("gas legacy: 200", "gas legacy: 150").replace("gas legacy: 300", "gas legacy: 310")
+OTHER_CONTENT = "contract D {}\n// ----\n// g() -> 2\n// gas legacy: 50\n"
+
+
+class TestGasSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.repo = make_temp_dir(self)
+
+        # take_snapshot() runs git in the current working directory.
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.repo)
+        self.git("init", "--quiet")
+        self.commit({TEST_FILE: OLD_CONTENT, OTHER_TEST_FILE: OTHER_CONTENT}, "old")
+        self.commit({TEST_FILE: NEW_CONTENT}, "new")
+
+        self.connection = open_database(":memory:")
+        self.addCleanup(self.connection.close)
+
+    def git(self, *args):
+        environment = dict(
+            os.environ,
+            GIT_AUTHOR_NAME="test", GIT_AUTHOR_EMAIL="test@example.com",
+            GIT_COMMITTER_NAME="test", GIT_COMMITTER_EMAIL="test@example.com",
+        )
+        subprocess.run(["git", *args], cwd=self.repo, env=environment, check=True, stdout=subprocess.DEVNULL)
+
+    def commit(self, files, message):
+        for file_name, content in files.items():
+            (self.repo / file_name).parent.mkdir(parents=True, exist_ok=True)
+            (self.repo / file_name).write_text(content, encoding='utf-8')
+        self.git("add", ".")
+        self.git("commit", "--quiet", "-m", message)
+
+    def test_snapshots_are_incremental(self):
+        _, file_count, parsed = take_snapshot(self.connection, "HEAD~1", "old")
+        self.assertEqual((file_count, parsed), (2, 2))
+        # Only the file that changed is parsed again.
+        _, file_count, parsed = take_snapshot(self.connection, "HEAD", "new")
+        self.assertEqual((file_count, parsed), (2, 1))
+
+    def test_compare_snapshots(self):
+        take_snapshot(self.connection, "HEAD~1", "old")
+        take_snapshot(self.connection, "HEAD", "new")
+
+        rows = compare_snapshots(
+            self.connection,
+            find_snapshot(self.connection, "old"),
+            find_snapshot(self.connection, "new"),
+            10
+        )
+        self.assertEqual(rows, [
+            ("a.sol", "f()", "legacy", 200, 150, -50),
+            ("a.sol", "f()", "legacy", 300, 310, 10),
+        ])
+        self.assertEqual(compare_snapshots(self.connection, *[find_snapshot(self.connection, "old")] * 2, 10), [])
+
+    def test_gas_history(self):
+        old_commit, _, _ = take_snapshot(self.connection, "HEAD~1", "old")
+        new_commit, _, _ = take_snapshot(self.connection, "HEAD", "new")
+
+        # Paths are relative to the semantic tests directory.
+        self.assertEqual(gas_history(self.connection, "a.sol", "f()"), [
+            (old_commit, "old", "f()", 0, "irOptimized", 100),
+            (new_commit, "new", "f()", 0, "irOptimized", 100),
+            (old_commit, "old", "f()", 0, "legacy", 200),
+            (new_commit, "new", "f()", 0, "legacy", 150),
+            (old_commit, "old", "f()", 1, "legacy", 300),
+            (new_commit, "new", "f()", 1, "legacy", 310),
+        ])
+        self.assertEqual(gas_history(self.connection, "a.sol", "g()"), [])
+        self.assertEqual(gas_history(self.connection, "dir/b.sol"), [
+            (old_commit, "old", "g()", 0, "legacy", 50),
+            (new_commit, "new", "g()", 0, "legacy", 50),
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+
+import os
+import unittest
+
+from textwrap import dedent
+from unittest import mock
+
+from unittest_helpers import make_temp_dir
+
+# NOTE: This test file file only works with scripts/ added to PYTHONPATH so pylint can't find the imports
+# pragma pylint: disable=import-error
+import isoltest_format
+from isoltest_format import parse_test_file
+# pragma pylint: enable=import-error
+
+MULTI_SOURCE_TEST = dedent("""\
+    ==== Source: A.sol ====
+    contract A {}
+    ==== ExternalSource: _external/external.sol ====
+    ==== ExternalSource: b.sol=_external/other.sol ====
+    ==== Source: dir/B.sol ====
+    import "A.sol";
+
+    contract B is A {}
+    // ====
+    // compileViaYul: true
+    // EVMVersion: >=byzantium
+    // ----
+    // f() -> 1
+    // gas legacy: 100
+""")
+
+
+class TestParseTestFile(unittest.TestCase):
+    def test_single_source(self):
+        parsed = parse_test_file("contract C {}\n// ----\n// TypeError 1234: (0-13): Error.\n")
+        self.assertEqual(parsed.sources, {"": "contract C {}\n"})
+        self.assertEqual(parsed.external_sources, {})
+        self.assertEqual(parsed.settings, {})
+        self.assertEqual(parsed.expectations, ["// TypeError 1234: (0-13): Error."])
+        self.assertEqual(parsed.expectations_line, 3)
+
+    def test_multiple_sources(self):
+        parsed = parse_test_file(MULTI_SOURCE_TEST)
+        self.assertEqual(parsed.sources, {
+            "A.sol": "contract A {}\n",
+            "dir/B.sol": 'import "A.sol";\n\ncontract B is A {}\n',
+        })
+        self.assertEqual(list(parsed.sources)[-1], "dir/B.sol")
+        self.assertEqual(parsed.external_sources, {
+            "_external/external.sol": "_external/external.sol",
+            "b.sol": "_external/other.sol",
+        })
+        self.assertEqual(parsed.settings, {"compileViaYul": "true", "EVMVersion": ">=byzantium"})
+        self.assertEqual(parsed.expectations, ["// f() -> 1", "// gas legacy: 100"])
+        self.assertEqual(parsed.expectations_line, 13)
+
+    def test_no_expectations(self):
+        parsed = parse_test_file("contract C {}")
+        self.assertEqual(parsed.sources, {"": "contract C {}\n"})
+        self.assertEqual(parsed.expectations, [])
+
+    def test_expectations_are_not_parsed_as_sources(self):
+        parsed = parse_test_file("contract C {}\n// ----\n==== Source: A.sol ====\n// ====\n")
+        self.assertEqual(parsed.sources, {"": "contract C {}\n"})
+        self.assertEqual(parsed.expectations, ["==== Source: A.sol ====", "// ===="])
+
+    def test_invalid_settings(self):
+        with self.assertRaises(isoltest_format.TestFileFormatError):
+            parse_test_file("contract C {}\n// ====\n// compileViaYul\n// ----\n")
+        with self.assertRaises(isoltest_format.TestFileFormatError):
+            parse_test_file("contract C {}\n// ====\ncontract D {}\n// ----\n")
+
+    def test_duplicate_source(self):
+        with self.assertRaises(isoltest_format.TestFileFormatError):
+            parse_test_file("==== Source: A ====\n==== Source: A ====\n// ----\n")
+
+
+class TestTestFileCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = make_temp_dir(self)
+        self.cache_file = self.temp_dir / "cache.sqlite"
+        self.test_file = self.temp_dir / "test.sol"
+        self.test_file.write_text(MULTI_SOURCE_TEST, encoding="utf8")
+
+    def test_unchanged_files_are_not_parsed_again(self):
+        with isoltest_format.TestFileCache(self.cache_file) as cache:
+            expected = cache.read(self.test_file)
+
+        with mock.patch.object(isoltest_format, "parse_test_file") as parse:
+            with isoltest_format.TestFileCache(self.cache_file) as cache:
+                self.assertEqual(cache.read(self.test_file), expected)
+                # Touching the file without changing it only requires comparing the hash.
+                stat = os.stat(self.test_file)
+                os.utime(self.test_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000))
+                self.assertEqual(cache.read(self.test_file), expected)
+            parse.assert_not_called()
+
+    def test_changed_files_are_parsed_again(self):
+        with isoltest_format.TestFileCache(self.cache_file) as cache:
+            cache.read(self.test_file)
+            self.test_file.write_text("contract C {}\n// ----\n", encoding="utf8")
+            self.assertEqual(cache.read(self.test_file).sources, {"": "contract C {}\n"})
+
+
+if __name__ == '__main__':
+    unittest.main()
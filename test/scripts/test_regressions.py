@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+import unittest
+
+from pathlib import Path
+from unittest import mock
+
+from unittest_helpers import make_temp_dir
+
+# NOTE: This test file file only works with scripts/ added to PYTHONPATH so pylint can't find the imports
+# pragma pylint: disable=import-error
+from regressions import DESCRIPTION, LogScanner, regressor
+# pragma pylint: enable=import-error
+
+
+class TestLogScanner(unittest.TestCase):
+    def test_error_split_between_chunks(self):
+        scanner = LogScanner()
+        self.assertFalse(scanner.feed(b"Running: in1\nExecuted in1 in 3 ms\n==1==ERROR: libFu"))
+        self.assertTrue(scanner.feed(b"zzer: deadly signal\n"))
+        self.assertEqual(scanner.timings, {"in1": 3})
+
+    def test_timing_split_between_chunks(self):
+        scanner = LogScanner()
+        for chunk in [b"Execu", b"ted in1 in 1", b"2 ms\nExecuted in2 in 5 ms"]:
+            scanner.feed(chunk)
+        self.assertEqual(scanner.timings, {"in1": 12})
+        # The last line has no newline and is only scanned by finish().
+        self.assertFalse(scanner.finish())
+        self.assertEqual(scanner.timings, {"in1": 12, "in2": 5})
+
+    def test_error_in_last_line(self):
+        scanner = LogScanner()
+        self.assertFalse(scanner.feed(b"output\nERROR: UndefinedBehaviorSanitizer"))
+        self.assertTrue(scanner.finish())
+
+    def test_error_in_overlong_line(self):
+        scanner = LogScanner()
+        scanner.feed(b"x" * LogScanner.MAX_LINE_LENGTH)
+        self.assertFalse(scanner.feed(b"x" * 100 + b"ERROR: lib"))
+        self.assertTrue(scanner.feed(b"Fuzzer: out-of-memory\n"))
+
+
+class TestRunInputs(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = make_temp_dir(self)
+        self.logfile = str(self.tmp_dir / "fuzzer.log")
+        self.regressor = regressor(DESCRIPTION, ["-o", str(self.tmp_dir)])
+        self.batches = []
+
+    def run_inputs(self, inputs, fails):
+        """Runs the inputs with a fuzzer that fails on every batch for which ``fails`` returns True."""
+        def run_batch(_fuzzer, batch, _logfile, _timings):
+            self.batches.append(batch)
+            return not fails(batch)
+
+        with mock.patch.object(self.regressor, "run_batch", side_effect=run_batch):
+            return self.regressor.run_inputs("fuzzer", inputs, self.logfile, {})
+
+    def test_passing_batch_runs_once(self):
+        inputs = [f"input{i}" for i in range(8)]
+        self.assertEqual(self.run_inputs(inputs, lambda batch: False), [])
+        self.assertEqual(self.batches, [inputs])
+
+    def test_bisection_finds_failing_inputs(self):
+        inputs = [f"input{i}" for i in range(8)]
+        failed = self.run_inputs(inputs, lambda batch: "input2" in batch or "input7" in batch)
+
+        self.assertEqual(failed, ["input2", "input7"])
+        # Halves without a failing input are not split any further.
+        self.assertNotIn(["input0"], self.batches)
+        self.assertIn(["input0", "input1"], self.batches)
+
+    def test_order_dependent_failure_reports_whole_batch(self):
+        inputs = [f"input{i}" for i in range(4)]
+        # Only fails when input0 and input3 run in the same invocation.
+        failed = self.run_inputs(inputs, lambda batch: "input0" in batch and "input3" in batch)
+
+        self.assertEqual(failed, inputs)
+        self.assertEqual(self.batches, [inputs, inputs[:2], inputs[2:]])
+        self.assertIn("failed together, but not when split in halves", Path(self.logfile).read_text(encoding='utf8'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+
+import importlib.util
+import json
+import os
+import subprocess
+import unittest
+
+from pathlib import Path
+from textwrap import dedent
+from unittest import mock
+
+from unittest_helpers import make_temp_dir
+
+# NOTE: This test file file only works with scripts/ added to PYTHONPATH so pylint can't find the imports
+# pragma pylint: disable=import-error
+import run_proofs
+from run_proofs import FAILED, PASSED, UNKNOWN, ProofCache, changed_proofs, local_imports, proof_key
+from run_proofs import read_statistics, run_proof
+# pragma pylint: enable=import-error
+
+FORMAL_DIR = Path(__file__).parents[1] / "formal"
+
+
+class TestChangedProofs(unittest.TestCase):
+    def setUp(self):
+        self.repo = make_temp_dir(self)
+        self.proof_dir = self.repo / "test/formal"
+        self.proof_dir.mkdir(parents=True)
+        for module in ["rule.py", "a.py", "b.py"]:
+            (self.proof_dir / module).write_text("", encoding="utf8")
+        (self.repo / "README.md").write_text("", encoding="utf8")
+        self.git("init", "--quiet")
+        self.git("add", ".")
+        self.git("commit", "--quiet", "-m", "proofs")
+
+        for name, value in [("REPO_ROOT", self.repo), ("PROOF_DIR", self.proof_dir)]:
+            patcher = mock.patch.object(run_proofs, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def git(self, *args):
+        environment = dict(
+            os.environ,
+            GIT_AUTHOR_NAME="test", GIT_AUTHOR_EMAIL="test@example.com",
+            GIT_COMMITTER_NAME="test", GIT_COMMITTER_EMAIL="test@example.com",
+        )
+        subprocess.run(["git", *args], cwd=self.repo, env=environment, check=True, stdout=subprocess.DEVNULL)
+
+    def test_only_changed_proofs(self):
+        self.assertEqual(changed_proofs("HEAD"), [])
+
+        (self.repo / "README.md").write_text("changed", encoding="utf8")
+        (self.proof_dir / "b.py").write_text("# changed", encoding="utf8")
+        self.assertEqual(changed_proofs("HEAD"), [self.proof_dir / "b.py"])
+
+    def test_changed_helper_module_runs_all_proofs(self):
+        (self.proof_dir / "rule.py").write_text("# changed", encoding="utf8")
+        self.assertEqual(changed_proofs("HEAD"), [self.proof_dir / "a.py", self.proof_dir / "b.py"])
+
+
+class TestProofKey(unittest.TestCase):
+    def setUp(self):
+        self.proof_dir = make_temp_dir(self)
+        self.write("proof.py", "import rule\nfrom z3 import *\n")
+        self.write("rule.py", "from opcodes import *\nimport util\n")
+        self.write("opcodes.py", "import rule\n")
+        self.write("util.py", "")
+        self.write("other.py", "")
+        self.write("broken.py", "import rule\ndef (\n")
+
+    def write(self, module, content):
+        (self.proof_dir / module).write_text(content, encoding="utf8")
+
+    def test_local_imports_are_followed(self):
+        self.assertEqual(
+            local_imports(self.proof_dir / "proof.py"),
+            {self.proof_dir / module for module in ["rule.py", "opcodes.py", "util.py"]}
+        )
+        self.assertEqual(local_imports(self.proof_dir / "broken.py"), set())
+
+    def test_key_depends_on_solver_and_imported_modules(self):
+        proof = self.proof_dir / "proof.py"
+        key = proof_key(proof, "4.12.2")
+        self.assertEqual(proof_key(proof, "4.12.2"), key)
+        self.assertNotEqual(proof_key(proof, "4.13.0"), key)
+
+        self.write("other.py", "# changed")
+        self.assertEqual(proof_key(proof, "4.12.2"), key)
+        self.write("util.py", "# changed")
+        self.assertNotEqual(proof_key(proof, "4.12.2"), key)
+
+
+class TestProofCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_file = make_temp_dir(self) / "cache.json"
+
+    @staticmethod
+    def result(status, reason=None):
+        return (status, 1.0, reason, "", {"checks": 1, "time": 0.5, "conflicts": 0, "memory": 10.0})
+
+    def test_only_conclusive_results_are_cached(self):
+        cache = ProofCache(self.cache_file)
+        cache.add("passed", self.result(PASSED))
+        cache.add("failed", self.result(FAILED, "Rule is incorrect."))
+        cache.add("unknown", self.result(UNKNOWN, "timeout after 10 s"))
+        cache.add("killed", self.result(FAILED, "killed by signal 9"))
+        cache.save()
+
+        self.assertEqual(ProofCache(self.cache_file).results, {
+            "passed": self.result(PASSED),
+            "failed": self.result(FAILED, "Rule is incorrect."),
+        })
+
+    def test_older_versions_are_discarded(self):
+        self.cache_file.write_text(
+            json.dumps({"version": 2, "results": {"killed": list(self.result(FAILED, "killed by signal 9"))}}),
+            encoding="utf8"
+        )
+        self.assertEqual(ProofCache(self.cache_file).results, {})
+
+
+class TestReadStatistics(unittest.TestCase):
+    def setUp(self):
+        self.statistics_file = make_temp_dir(self) / "statistics.jsonl"
+
+    def test_summary(self):
+        entries = [
+            {"check": "requirements", "time": 0.5, "sat conflicts": 3, "max memory": 20.0},
+            {"check": "rule", "time": 1.0, "conflicts": 10, "max memory": 35.5},
+            {"check": "rule", "time": 2.0, "max memory": 30.0},
+        ]
+        # The last line is cut off, as if the proof was killed while writing it.
+        self.statistics_file.write_text(
+            "".join(json.dumps(entry) + "\n" for entry in entries) + '{"check": "ru',
+            encoding="utf8"
+        )
+        self.assertEqual(
+            read_statistics(self.statistics_file),
+            {"checks": 2, "time": 3.5, "conflicts": 13, "memory": 35.5}
+        )
+
+    def test_missing_file(self):
+        self.assertEqual(read_statistics(self.statistics_file), {"checks": 0, "time": 0.0, "conflicts": 0, "memory": 0.0})
+
+
+@unittest.skipUnless(importlib.util.find_spec("z3"), "z3 is not installed")
+class TestRunProof(unittest.TestCase):
+    def setUp(self):
+        self.proof = make_temp_dir(self) / "proof.py"
+
+    def run_rules(self, *rules):
+        self.proof.write_text(dedent(f"""\
+            import sys
+            sys.path.insert(0, {str(FORMAL_DIR)!r})
+            from rule import Rule
+            from z3 import BitVec
+            rule = Rule()
+            X = BitVec("X", 256)
+            rule.require(X != 0)
+        """) + "".join(f"rule.check({rule})\n" for rule in rules), encoding="utf8")
+        return run_proof(self.proof, 60, 0)
+
+    def test_statistics_of_passing_proof(self):
+        status, _, reason, _, statistics = self.run_rules("X + 0, X", "X * 1, X")
+        self.assertEqual((status, reason), (PASSED, None))
+        self.assertEqual(statistics["checks"], 2)
+
+    def test_incorrect_rule(self):
+        status, _, reason, output, statistics = self.run_rules("X + 1, X")
+        self.assertEqual((status, reason), (FAILED, "Rule is incorrect."))
+        self.assertIn("Model:", output)
+        self.assertEqual(statistics["checks"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+
+import unittest
+
+from textwrap import dedent
+
+from unittest_helpers import make_temp_dir
+
+# NOTE: This test file file only works with scripts/ added to PYTHONPATH so pylint can't find the imports
+# pragma pylint: disable=import-error
+from triage_crashes import FAILED, PASSED, TIMEOUT, TriageCache, bucket_results, crash_signature
+# pragma pylint: enable=import-error
+
+
+class TestCrashSignature(unittest.TestCase):
+    def test_boost_exception(self):
+        output = dedent("""
+            terminate called after throwing an instance of 'boost::wrapexcept<solidity::langutil::InternalCompilerError>'
+              what():  /home/user/solidity/libsolidity/codegen/ContractCompiler.cpp(1207): Throw in function void f()
+            Dynamic exception type: boost::wrapexcept<solidity::langutil::InternalCompilerError>
+            std::exception::what: Assertion failed
+        """)
+        moved = output.replace("/home/user/solidity/", "/build/")
+        self.assertEqual(
+            crash_signature(output),
+            "solidity::langutil::InternalCompilerError at libsolidity/codegen/ContractCompiler.cpp:1207"
+        )
+        self.assertEqual(crash_signature(output), crash_signature(moved))
+
+    def test_exception_without_location(self):
+        output = "terminate called after throwing an instance of 'std::out_of_range'\n  what():  vector::_M_range_check\n"
+        self.assertEqual(crash_signature(output), "std::out_of_range")
+
+    def test_sanitizer_frames(self):
+        output = dedent("""
+            =================================================================
+            ==4242==ERROR: AddressSanitizer: heap-use-after-free on address 0x602000000010 at pc 0x0000004f5a3c
+                #0 0x4f5a3c in solidity::frontend::TypeChecker::visit(solidity::frontend::Assignment const&) /src/libsolidity/analysis/TypeChecker.cpp:12:3
+                #1 0x4f0000 in solidity::frontend::Assignment::accept(solidity::frontend::ASTConstVisitor&) /src/libsolidity/ast/AST_accept.h:700:5
+                #2 0x4e0000 in solidity::frontend::ASTNode::accept() (/build/solfuzzer+0x4e0000)
+                #3 0x4d0000 in main /src/test/tools/afl_fuzzer.cpp:100:1
+        """)
+        self.assertEqual(
+            crash_signature(output),
+            "AddressSanitizer: heap-use-after-free | "
+            "solidity::frontend::TypeChecker::visit(solidity::frontend::Assignment const&) | "
+            "solidity::frontend::Assignment::accept(solidity::frontend::ASTConstVisitor&) | "
+            "solidity::frontend::ASTNode::accept()"
+        )
+        self.assertEqual(crash_signature(output.replace("0x4f5a3c", "0x5f5a3c").replace("4242", "17")), crash_signature(output))
+
+    def test_assertion(self):
+        output = "solfuzzer: /src/libsolutil/CommonData.h:321: T f(): Assertion `x < 3' failed.\n"
+        self.assertEqual(crash_signature(output), "assertion failed at libsolutil/CommonData.h:321")
+
+    def test_first_line_fallback(self):
+        self.assertEqual(crash_signature("\nStack too deep at 0x20, 17 slots\nmore\n"), "Stack too deep at N, N slots")
+        self.assertEqual(crash_signature(""), "no output")
+
+
+class TestBucketResults(unittest.TestCase):
+    def test_smallest_input_represents_bucket(self):
+        results = {
+            "a": (30, (FAILED, "X at f.cpp:1", ["a"])),
+            "b": (10, (FAILED, "X at f.cpp:1", ["b"])),
+            "c": (20, (FAILED, "Y", ["c"])),
+            "d": (5, (PASSED, None, [])),
+            "e": (5, (TIMEOUT, "timeout after 60 s", [])),
+            "f": (40, (FAILED, "X at f.cpp:1", ["f"])),
+        }
+        buckets = bucket_results(results)
+        self.assertEqual([bucket["signature"] for bucket in buckets], ["X at f.cpp:1", "Y", "timeout after 60 s"])
+        self.assertEqual(buckets[0]["count"], 3)
+        self.assertEqual(buckets[0]["representative"], "b")
+        self.assertEqual(buckets[0]["output"], ["b"])
+        self.assertEqual(buckets[0]["inputs"], ["a", "b", "f"])
+        self.assertEqual(buckets[2]["status"], TIMEOUT)
+
+
+class TestTriageCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_file = make_temp_dir(self) / "cache.json"
+
+    def test_timeouts_are_not_cached(self):
+        cache = TriageCache(self.cache_file, "fuzzer")
+        cache.add("a", (FAILED, "Y", ["a"]))
+        cache.add("b", (PASSED, None, []))
+        cache.add("c", (TIMEOUT, "timeout after 60 s", []))
+        cache.save()
+
+        self.assertEqual(TriageCache(self.cache_file, "fuzzer").results, {
+            "a": [FAILED, "Y", ["a"]],
+            "b": [PASSED, None, []],
+        })
+
+    def test_results_of_other_fuzzer_are_ignored(self):
+        cache = TriageCache(self.cache_file, "fuzzer")
+        cache.add("a", (PASSED, None, []))
+        cache.save()
+
+        self.assertEqual(TriageCache(self.cache_file, "other fuzzer").results, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python
+
+import importlib.util
+import io
+import unittest
+
+from contextlib import redirect_stdout
+from pathlib import Path
+from textwrap import dedent
+
+from unittest_helpers import make_temp_dir
+
+# The script cannot be imported by name because of the dash in its file name.
+_SPEC = importlib.util.spec_from_file_location(
+    "verify_testcases",
+    Path(__file__).parents[2] / "scripts/endToEndExtraction/verify-testcases.py"
+)
+verify_testcases = importlib.util.module_from_spec(_SPEC)
+_SPEC.loader.exec_module(verify_testcases)
+
+METADATA = '{"compiler": {"version": "0.8.0"}, "settings": {"optimizer": false}, "sources": {"a": 1}}'
+OPTIMIZED_METADATA = METADATA.replace("false", "true")
+
+LEFT_TRACE = dedent(f"""\
+    Running 3 test cases...
+    test/libsolidity/SolidityEndToEndTest.cpp(10): Entering test case "same"
+    metadata: {METADATA}
+    CREATE 0000000000000000000000000000000000001000:
+     in:      6080aabb0002
+     out:     6080ccdd0002
+     result: 1
+     gas used: 1000
+    test/libsolidity/SolidityEndToEndTest.cpp(10): Leaving test case "same"; testing time: 100us
+    test/libsolidity/SolidityEndToEndTest.cpp(20): Entering test case "different"
+    metadata: {METADATA}
+    CALL   0000000000000000000000000000000000001000 -> 0000000000000000000000000000000000002000:
+     value: 5
+     in:      12345678
+     out:     00000001
+     result: 1
+     gas used: 2000
+    test/libsolidity/SolidityEndToEndTest.cpp(30): Entering test case "only_left"
+    metadata: {METADATA}
+""")
+
+RIGHT_TRACE = dedent(f"""\
+    test/libsolidity/semanticTests/extracted/different.sol: Entering test case "different"
+    metadata: {METADATA}
+    CALL   0000000000000000000000000000000000001000 -> 0000000000000000000000000000000000002000:
+     value: 6
+     in:      12345678
+     out:     00000002
+     result: 1
+     gas used: 2500
+    test/libsolidity/semanticTests/extracted/same.sol: Entering test case "same"
+    metadata: {OPTIMIZED_METADATA}
+    CREATE 0000000000000000000000000000000000001000:
+     in:      6080eeff0002
+     out:     6080ccdd0002
+     result: 1
+     gas used: 1500
+""")
+
+# Metadata is compared without the sources and the compiler version.
+COMPARED_METADATA = '{"compiler": {}, "settings": {"optimizer": false}}'
+LEFT_CALL = "kind='call' parameter='0000000000000000000000000000000000001000' input='' output='' value='5' result='1'"
+RIGHT_CALL = LEFT_CALL.replace("value='5'", "value='6'")
+VALUE_POSITION = LEFT_CALL.index("value='5'") + len("value='")
+
+# Tests are reported in the order of the first trace, tests missing in either trace are ignored.
+EXPECTED_REPORT = (
+    "same\n"
+    f"metadata where different: {COMPARED_METADATA} != {COMPARED_METADATA.replace('false', 'true')}\n"
+    "different\n"
+    f"    {LEFT_CALL}\n"
+    f"    {RIGHT_CALL}\n"
+    f"    {' ' * VALUE_POSITION}|{' ' * (len(LEFT_CALL) - VALUE_POSITION - 1)}\n"
+    "\n"
+    "2 test-cases -  2  mismatche(s)\n"
+)
+
+
+class TestTraceLinePattern(unittest.TestCase):
+    def test_line_kinds(self):
+        lines = {
+            'x.cpp(1): Entering test case "a b"': ("test", "a b"),
+            f"metadata: {METADATA}": ("metadata", METADATA),
+            "CREATE 00ff:": ("create", "00ff"),
+            "CALL   00ff -> 11aa:": ("callee", "11aa"),
+            " in:      1234": ("value", "1234"),
+            " gas used: 21000": ("value", "21000"),
+        }
+        for line, (kind, value) in lines.items():
+            match = verify_testcases.TRACE_LINE_PATTERN.match(line)
+            self.assertEqual((match.lastgroup, match.group(match.lastgroup)), (kind, value), line)
+
+    def test_other_lines_are_ignored(self):
+        for line in ['x.cpp(1): Leaving test case "a"; testing time: 1us', "Running 3 test cases...", ""]:
+            self.assertIsNone(verify_testcases.TRACE_LINE_PATTERN.match(line), line)
+
+
+class TestTrace(unittest.TestCase):
+    def test_digest_ignores_gas_and_metadata_of_bytecode(self):
+        left = verify_testcases.Trace("create", "00ff")
+        left.set_input("6080aabb0002")
+        left.gas = "1000"
+        right = verify_testcases.Trace("create", "00ff")
+        right.set_input("6080ccdd0002")
+        right.gas = "2000"
+
+        self.assertEqual(left.get_input(), "6080")
+        self.assertEqual(left.digest(), right.digest())
+
+        right = verify_testcases.Trace("create", "00ff")
+        right.result = "1"
+        self.assertNotEqual(left.digest(), right.digest())
+
+    def test_trace_mismatch_marks_differing_characters(self):
+        self.assertEqual(verify_testcases.trace_mismatch("abcd", "abd"), "    abcd\n    abd\n      ||\n")
+
+
+class TestComparison(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = make_temp_dir(self)
+        self.left_trace = self.temp_dir / "left.trace"
+        self.right_trace = self.temp_dir / "right.trace"
+        self.left_trace.write_text(LEFT_TRACE, encoding="utf8")
+        self.right_trace.write_text(RIGHT_TRACE, encoding="utf8")
+
+    @staticmethod
+    def report(*argv):
+        """Returns the output of the script without the lines printed while parsing a trace."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            verify_testcases.main([str(arg) for arg in argv])
+        return "".join(
+            line for line in output.getvalue().splitlines(keepends=True)
+            if not line.endswith("test-cases.\n") and not line.startswith("imported into ")
+        )
+
+    def test_traces(self):
+        self.assertEqual(self.report("-s", self.left_trace, "-e", self.right_trace), EXPECTED_REPORT)
+
+    def test_identical_traces(self):
+        self.assertEqual(
+            self.report("-s", self.left_trace, "-e", self.left_trace),
+            "3 test-cases -  0  mismatche(s)\n"
+        )
+
+    def test_imported_stores(self):
+        left_store = self.temp_dir / "left.sqlite"
+        right_store = self.temp_dir / "right.sqlite"
+        self.report("-i", self.left_trace, "-d", left_store)
+        self.report("-i", self.right_trace, "-d", right_store)
+
+        self.assertEqual(self.report("-s", left_store, "-e", right_store), EXPECTED_REPORT)
+        self.assertEqual(self.report("-s", left_store, "-e", self.right_trace), EXPECTED_REPORT)
+
+    def test_import_replaces_store_content(self):
+        store = self.temp_dir / "store.sqlite"
+        self.report("-i", self.right_trace, "-d", store)
+        self.report("-i", self.left_trace, "-d", store)
+
+        self.assertEqual(
+            self.report("-s", store, "-e", self.left_trace),
+            "3 test-cases -  0  mismatche(s)\n"
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
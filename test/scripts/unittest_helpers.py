@@ -1,3 +1,6 @@
+import shutil
+import tempfile
+import unittest
 from pathlib import Path
 from typing import Union
 
@@ -15,3 +18,9 @@ def load_fixture(relative_path: Union[Path, str]) -> str:
 
 def load_libsolidity_test_case(relative_path: Union[Path, str]) -> str:
     return load_file(LIBSOLIDITY_TEST_DIR / relative_path)
+
+def make_temp_dir(test_case: unittest.TestCase) -> Path:
+    """Creates a temporary directory that is removed when the test case finishes."""
+    temp_dir = Path(tempfile.mkdtemp())
+    test_case.addCleanup(shutil.rmtree, temp_dir)
+    return temp_dir